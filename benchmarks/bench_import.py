@@ -0,0 +1,98 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+MODULES = [
+    'opaf.lib',
+    'opaf.opaf',
+]
+
+HEAVY_MODULES = [
+    'PIL',
+    'numpy',
+    'importlib.metadata',
+    'asyncio',
+    'concurrent.futures',
+    'http.server',
+    'sqlite3',
+    'urllib.request',
+    'zipfile',
+]
+
+
+def time_import(module, runs):
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import ' + module], check=True)
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def get_loaded_modules(module):
+    # Report which heavy modules are pulled in by importing the given module
+    code = (
+        'import sys; import ' + module + '; '
+        + 'print(",".join(m for m in ' + repr(HEAVY_MODULES) + ' if m in sys.modules))'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+
+    return result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OPAF import time benchmark')
+    parser.add_argument(
+        '--runs',
+        type=int,
+        default=10,
+        help='Number of interpreter launches per module (Default: 10)'
+    )
+
+    args = parser.parse_args()
+
+    # Baseline interpreter startup
+    baseline = min(time_import('sys', args.runs))
+    print('interpreter startup: %.1f ms' % (baseline * 1000))
+
+    for module in MODULES:
+        timings = time_import(module, args.runs)
+
+        print(
+            '%s: min %.1f ms, median %.1f ms (import only: %.1f ms), '
+            'heavy modules: %s' % (
+                module,
+                min(timings) * 1000,
+                statistics.median(timings) * 1000,
+                (min(timings) - baseline) * 1000,
+                get_loaded_modules(module) or 'none'
+            )
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import gen_pattern
+
+from opaf.lib import (
+    OPAFCompiler,
+    OPAFImageExtractor,
+    OPAFPackager,
+    OPAFParser,
+    Utils
+)
+
+
+SCALES = {
+    'small': {},
+    'medium': {
+        'values': 50,
+        'configs': 20,
+        'actions': 40,
+        'blocks': 50,
+        'depth': 4,
+        'charts': 10,
+        'rows': 100,
+        'components': 10,
+        'images': 8,
+        'image_size': 512,
+    },
+    'large': {
+        'values': 200,
+        'configs': 50,
+        'actions': 100,
+        'blocks': 200,
+        'depth': 4,
+        'charts': 40,
+        'rows': 300,
+        'components': 60,
+        'images': 24,
+        'image_size': 1024,
+    },
+}
+
+# Baseline of the local machine, timings are not comparable between machines
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+STAGES = [
+    'parse',
+    'package',
+    'parse_package',
+    'compile',
+    'extract',
+]
+
+
+def measure(func, runs):
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # Separate run so tracing overhead does not affect timings
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, {
+        'time': statistics.median(timings) * 1000,
+        'min': min(timings) * 1000,
+        'peak': peak,
+    }
+
+
+def run_scale(scale, runs, dir):
+    src_path = gen_pattern.generate(dir, **SCALES[scale])
+    pkg_path = os.path.join(dir, 'pattern.opafpkg')
+    results = {}
+
+    doc, results['parse'] = measure(lambda: OPAFParser(src_path).parse(), runs)
+
+    pkg, results['package'] = measure(lambda: OPAFPackager(doc).package(), runs)
+    Utils.write_to_file(pkg, pkg_path)
+
+    pkg_doc, results['parse_package'] = measure(
+        lambda: OPAFParser(pkg_path).parse(),
+        runs
+    )
+
+    _, results['compile'] = measure(
+        lambda: OPAFCompiler(pkg_doc).compile('Synthetic'),
+        runs
+    )
+
+    _, results['extract'] = measure(
+        lambda: OPAFImageExtractor(pkg_doc.opaf_images).extract(
+            os.path.join(dir, 'images_out')
+        ),
+        runs
+    )
+
+    return results
+
+
+def get_change(value, baseline):
+    if not baseline:
+        return None
+
+    return (value - baseline) / baseline * 100
+
+
+def report(results, baselines, threshold):
+    regressions = []
+
+    print('%-8s %-14s %10s %10s %8s %12s %12s %8s' % (
+        'scale', 'stage', 'time (ms)', 'baseline', 'change',
+        'peak (KB)', 'baseline', 'change'
+    ))
+
+    for scale in results:
+        for stage in STAGES:
+            r = results[scale][stage]
+            b = baselines.get(scale, {}).get(stage, {})
+
+            time_change = get_change(r['time'], b.get('time'))
+            peak_change = get_change(r['peak'], b.get('peak'))
+
+            print('%-8s %-14s %10.1f %10s %8s %12.1f %12s %8s' % (
+                scale,
+                stage,
+                r['time'],
+                '%.1f' % b['time'] if 'time' in b else '-',
+                '%+.1f%%' % time_change if time_change is not None else '-',
+                r['peak'] / 1024,
+                '%.1f' % (b['peak'] / 1024) if 'peak' in b else '-',
+                '%+.1f%%' % peak_change if peak_change is not None else '-',
+            ))
+
+            for metric, change in [('time', time_change), ('peak', peak_change)]:
+                if change is not None and change > threshold:
+                    regressions.append(
+                        '%s/%s %s %+.1f%%' % (scale, stage, metric, change)
+                    )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OPAF pipeline benchmark')
+    parser.add_argument(
+        '--scales',
+        default='small,medium',
+        help='Comma separated scales to run (' + ', '.join(SCALES) + ')'
+    )
+    parser.add_argument(
+        '--runs',
+        type=int,
+        default=3,
+        help='Number of timed runs per stage (Default: 3)'
+    )
+    parser.add_argument(
+        '--save',
+        nargs='?',
+        const=BASELINE_PATH,
+        help='Write results as a local baseline file (Default: benchmarks/baseline.json)'
+    )
+    parser.add_argument(
+        '--compare',
+        nargs='?',
+        const=BASELINE_PATH,
+        help='Compare results against a local baseline file '
+        '(Default: benchmarks/baseline.json)'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=10.0,
+        help='Change in percent reported as a regression (Default: 10)'
+    )
+
+    args = parser.parse_args()
+
+    results = {}
+
+    for scale in args.scales.split(','):
+        scale = scale.strip()
+
+        if scale not in SCALES:
+            parser.error('unknown scale ' + scale)
+
+        with tempfile.TemporaryDirectory() as dir:
+            results[scale] = run_scale(scale, args.runs, dir)
+
+    baselines = {}
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='UTF-8') as f:
+            baselines = json.load(f)
+
+    regressions = report(results, baselines, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w', encoding='UTF-8') as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print('\nRegressions above %.1f%%:' % args.threshold)
+
+        for r in regressions:
+            print('  ' + r)
+
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
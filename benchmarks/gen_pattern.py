@@ -0,0 +1,231 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import argparse
+import os
+import random
+
+
+NAMESPACE = 'https://github.com/open-pattern-format/opaf'
+
+DEFAULTS = {
+    'values': 10,
+    'configs': 5,
+    'colors': 4,
+    'actions': 10,
+    'blocks': 10,
+    'depth': 3,
+    'charts': 2,
+    'rows': 20,
+    'components': 5,
+    'images': 2,
+    'image_size': 256,
+}
+
+
+def write_image(path, size, seed):
+    # Deferred so patterns without images can be generated without Pillow
+    from PIL import Image
+
+    rng = random.Random(seed)
+    img = Image.new('RGB', (size, size))
+    img.putdata([
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        for _ in range(size * size)
+    ])
+    img.save(path, 'PNG')
+
+
+def generate_actions(counts):
+    lines = ['<pattern xmlns:opaf="' + NAMESPACE + '">']
+
+    for i in range(counts['actions']):
+        lines += [
+            '  <opaf:define_action name="a%d" params="count=1">' % i,
+            '    <action name="a%d" count="${count}" total="${count}" />' % i,
+            '  </opaf:define_action>',
+        ]
+
+    lines.append('</pattern>')
+
+    return '\n'.join(lines) + '\n'
+
+
+def get_action(counts, i, count):
+    color = ''
+
+    if counts['colors']:
+        color = ' color="c%d"' % (i % counts['colors'])
+
+    return '<opaf:action name="a%d" count="%s"%s />' % (
+        i % counts['actions'],
+        count,
+        color
+    )
+
+
+def generate_pattern(counts):
+    lines = [
+        '<pattern xmlns:opaf="' + NAMESPACE + '" name="Synthetic Pattern" version="1.0">',
+        '  <opaf:include uri="file://actions.opaf" />',
+        '  <opaf:metadata>',
+        '    <title>Synthetic Pattern</title>',
+    ]
+
+    if counts['images']:
+        lines.append('    <image name="img0" />')
+
+    lines.append('  </opaf:metadata>')
+
+    for i in range(counts['colors']):
+        color = (i * 0x2f3b5d) % 0xffffff
+        lines.append('  <opaf:define_color name="c%d" value="#%06x" />' % (i, color))
+
+    for i in range(counts['configs']):
+        lines.append(
+            '  <opaf:define_config name="cfg%d" value="1" allowed_values="1,2,3" />' % i
+        )
+
+    # Values depend on the previous value so expressions are evaluated in order
+    for i in range(counts['values']):
+        if i == 0:
+            expr = '${10}'
+        else:
+            expr = '${v%d + 1}' % (i - 1)
+
+        lines.append('  <opaf:define_value name="v%d" value="%s" />' % (i, expr))
+
+    for i in range(counts['images']):
+        lines.append(
+            '  <opaf:define_image name="img%d" uri="file://images/img%d.png" />' % (i, i)
+        )
+
+    # Blocks reference the previous block up to the given nesting depth
+    for i in range(counts['blocks']):
+        lines += [
+            '  <opaf:define_block name="b%d" params="n">' % i,
+            '    <opaf:repeat count="${n}">',
+            '      ' + get_action(counts, i, 1),
+            '      ' + get_action(counts, i + 1, 2),
+            '    </opaf:repeat>',
+        ]
+
+        if i % counts['depth']:
+            lines.append('    <opaf:block name="b%d" n="${n}" />' % (i - 1))
+
+        lines.append('  </opaf:define_block>')
+
+    for i in range(counts['charts']):
+        lines.append('  <opaf:define_chart name="chart%d">' % i)
+
+        for r in range(counts['rows']):
+            lines.append(
+                '    <opaf:row type="round">'
+                + '<opaf:repeat count="4">'
+                + get_action(counts, r, 2)
+                + get_action(counts, r + 1, 2)
+                + '</opaf:repeat></opaf:row>'
+            )
+
+        lines.append('  </opaf:define_chart>')
+
+    for i in range(counts['components']):
+        lines.append('  <opaf:component name="Component %d">' % i)
+
+        if counts['images']:
+            lines.append('    <opaf:image name="img%d" />' % (i % counts['images']))
+
+        lines.append('    <opaf:instruction name="Part %d">' % i)
+
+        for r in range(counts['rows']):
+            row = '      <opaf:row type="round">'
+
+            if counts['blocks']:
+                # Start from the deepest block in a chain
+                b = min(
+                    counts['blocks'] - 1,
+                    (r % counts['blocks']) // counts['depth'] * counts['depth']
+                    + counts['depth'] - 1
+                )
+                row += '<opaf:block name="b%d" n="2" />' % b
+
+            if counts['values']:
+                count = '${v%d}' % (r % counts['values'])
+            else:
+                count = '1'
+
+            row += get_action(counts, r, count) + '</opaf:row>'
+            lines.append(row)
+
+        lines += [
+            '    </opaf:instruction>',
+            '    <opaf:text data="Component %d complete" />' % i,
+            '  </opaf:component>',
+        ]
+
+    lines.append('</pattern>')
+
+    return '\n'.join(lines) + '\n'
+
+
+def generate(path, **kwargs):
+    counts = dict(DEFAULTS)
+    counts.update(kwargs)
+    counts['actions'] = max(counts['actions'], 1)
+    counts['depth'] = max(counts['depth'], 1)
+
+    os.makedirs(os.path.join(path, 'images'), exist_ok=True)
+
+    with open(os.path.join(path, 'actions.opaf'), 'w', encoding='UTF-8') as f:
+        f.write(generate_actions(counts))
+
+    for i in range(counts['images']):
+        write_image(
+            os.path.join(path, 'images', 'img%d.png' % i),
+            counts['image_size'],
+            i
+        )
+
+    src_path = os.path.join(path, 'pattern.opaf')
+
+    with open(src_path, 'w', encoding='UTF-8') as f:
+        f.write(generate_pattern(counts))
+
+    return src_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic OPAF pattern generator')
+    parser.add_argument(
+        '--output',
+        required=True,
+        help='Output directory'
+    )
+
+    for name, value in DEFAULTS.items():
+        parser.add_argument(
+            '--' + name,
+            type=int,
+            default=value,
+            help='Number of ' + name.replace('_', ' ') + ' (Default: %d)' % value
+        )
+
+    args = vars(parser.parse_args())
+    output_path = args.pop('output')
+
+    print(generate(output_path, **args))
+
+
+if __name__ == '__main__':
+    main()
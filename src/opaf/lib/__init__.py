@@ -1,8 +1,47 @@
 # OPAF spec version supported
 SPEC_VERSION = "1.6"
 
+# Spec version of packages which use aliases or archive entries
+EXTENDED_SPEC_VERSION = "1.7"
+
+import importlib # noqa
+
+# Subsystems which import heavy modules are loaded on first use
+LAZY_IMPORTS = {
+    'OPAFImageExtractor': 'opaf.lib.opaf_image_extractor',
+    'OPAFProjectReader': 'opaf.lib.opaf_project_reader',
+    'OPAFRecolor': 'opaf.lib.opaf_recolor',
+    'OPAFChartRenderer': 'opaf.lib.opaf_chart_renderer',
+    'OPAFPackageReader': 'opaf.lib.opaf_package_reader',
+    'OPAFCatalog': 'opaf.lib.opaf_catalog',
+    'OPAFWatcher': 'opaf.lib.opaf_watcher',
+    'OPAFBatch': 'opaf.lib.opaf_batch',
+    'OPAFServer': 'opaf.lib.opaf_server',
+    'Async': 'opaf.lib.opaf_async',
+}
+
+
+def __getattr__(name):
+    if name not in LAZY_IMPORTS:
+        raise AttributeError("module 'opaf.lib' has no attribute '" + name + "'")
+
+    module = importlib.import_module(LAZY_IMPORTS[name])
+
+    # Async is exposed as a module
+    if name == 'Async':
+        value = module
+    else:
+        value = getattr(module, name)
+
+    globals()[name] = value
+
+    return value
+
+
 import opaf.lib.opaf_funcs as OPAFFuncs # noqa
 import opaf.lib.opaf_utils as Utils # noqa
+from opaf.lib.opaf_image_cache import OPAFImageCache # noqa
+from opaf.lib.opaf_index import OPAFIndex # noqa
 from opaf.lib.opaf_image import OPAFImage # noqa
 from opaf.lib.opaf_value import OPAFValue # noqa
 from opaf.lib.opaf_color import OPAFColor # noqa
@@ -10,9 +49,13 @@ from opaf.lib.opaf_config import OPAFConfig # noqa
 from opaf.lib.opaf_action import OPAFAction # noqa
 from opaf.lib.opaf_block import OPAFBlock # noqa
 from opaf.lib.opaf_chart import OPAFChart # noqa
+from opaf.lib.opaf_chart_grid import OPAFChartGrid # noqa
 from opaf.lib.opaf_metadata import OPAFMetadata # noqa
 from opaf.lib.opaf_component import OPAFComponent # noqa
 from opaf.lib.opaf_document import OPAFDocument # noqa
 from opaf.lib.opaf_compiler import OPAFCompiler # noqa
+from opaf.lib.opaf_minifier import OPAFMinifier # noqa
 from opaf.lib.opaf_packager import OPAFPackager # noqa
+from opaf.lib.opaf_snapshot import OPAFSnapshot # noqa
+from opaf.lib.opaf_build_cache import OPAFBuildCache # noqa
 from opaf.lib.opaf_parser import OPAFParser # noqa
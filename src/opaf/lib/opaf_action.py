@@ -33,8 +33,10 @@ class OPAFAction:
         self.params = params
         self.elements = elements
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None, elements=True):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("name", self.name)
         node.setAttribute("custom", str(self.custom).lower())
@@ -42,9 +44,10 @@ class OPAFAction:
         if len(self.params) > 0:
             node.setAttribute("params", Utils.params_to_str(self.params))
 
-        for e in self.elements:
-            element = parseString(e).documentElement
-            node.appendChild(element)
+        if elements:
+            for e in self.elements:
+                element = parseString(e).documentElement
+                node.appendChild(element)
 
         return node
 
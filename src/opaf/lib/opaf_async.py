@@ -0,0 +1,99 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import asyncio
+import functools
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from opaf.lib import OPAFCompiler, OPAFPackager, OPAFParser
+
+
+async def _run(executor, func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(
+        executor,
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+async def parse_async(src_path, executor=None, **kwargs):
+    return await _run(executor, OPAFParser(src_path, **kwargs).parse)
+
+
+async def package_async(doc, executor=None, dedupe=False):
+    return await _run(executor, OPAFPackager(doc, dedupe=dedupe).package)
+
+
+async def compile_async(doc, name, configs={}, colors={}, progress=None, executor=None):
+    """Compile in a thread so progress and cancellation can be shared.
+
+    executor must be None or a ThreadPoolExecutor. Process pools are rejected
+    because the compiler holds a cancellation event and progress callback
+    which can not be pickled.
+    """
+    if executor is not None and not isinstance(executor, ThreadPoolExecutor):
+        raise Exception("Compilation requires a thread pool executor")
+
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+
+    # Progress callbacks are called from the event loop
+    def on_progress(component, index, total):
+        event = {'component': component, 'index': index, 'total': total}
+        loop.call_soon_threadsafe(progress, event)
+
+    opaf_compiler = OPAFCompiler(
+        doc,
+        configs=configs,
+        colors=colors,
+        progress=on_progress if progress else None,
+        cancel=cancel
+    )
+
+    try:
+        return await _run(executor, opaf_compiler.compile, name)
+    finally:
+        # Stop compilation at the next component or block when cancelled
+        cancel.set()
+
+
+async def compile_events(doc, name, configs={}, colors={}, executor=None):
+    queue = asyncio.Queue()
+    task = asyncio.ensure_future(
+        compile_async(
+            doc,
+            name,
+            configs=configs,
+            colors=colors,
+            progress=queue.put_nowait,
+            executor=executor
+        )
+    )
+    task.add_done_callback(lambda t: queue.put_nowait(None))
+
+    try:
+        while True:
+            event = await queue.get()
+
+            if event is None:
+                break
+
+            yield event
+
+        yield {'result': task.result()}
+    finally:
+        task.cancel()
@@ -0,0 +1,254 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import csv
+import json
+import math
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from opaf.lib import OPAFCompiler, OPAFParser, Utils
+
+
+class OPAFBatch:
+
+    FIELDS = [
+        'package',
+        'name',
+        'configs',
+        'colors',
+        'output',
+        'id',
+    ]
+
+    def __init__(self, jobs, workers=None, output_path=None):
+        self.jobs = []
+        self.workers = workers
+        self.results = []
+
+        for i, j in enumerate(jobs):
+            self.jobs.append(OPAFBatch.__get_job(i, j, output_path))
+
+        self.__set_output_paths()
+
+    @staticmethod
+    def __get_job(index, job, output_path):
+        if not job.get('package'):
+            raise Exception("Batch job " + str(index + 1) + " has no package")
+
+        if not job.get('name'):
+            raise Exception("Batch job " + str(index + 1) + " has no name")
+
+        # Configs and colors can be given in the same form as the CLI
+        values = {}
+
+        for f in ['configs', 'colors']:
+            v = job.get(f) or {}
+
+            if isinstance(v, str):
+                v = Utils.parse_arg_list(v)
+
+            values[f] = {str(k): str(v[k]) for k in v}
+
+        return {
+            'index': index,
+            'package': os.path.abspath(job['package']),
+            'name': job['name'],
+            'configs': values['configs'],
+            'colors': values['colors'],
+            'output': job.get('output') or output_path,
+            'id': str(job.get('id') or ''),
+            'path': None,
+        }
+
+    @staticmethod
+    def __get_file_name(name):
+        return name.strip().replace(' ', '_').lower()
+
+    def __set_output_paths(self):
+        paths = {}
+
+        for j in self.jobs:
+            if not j['output']:
+                continue
+
+            name = self.__get_file_name(j['name'])
+
+            if j['id']:
+                name += '_' + self.__get_file_name(j['id'])
+
+            j['path'] = os.path.abspath(os.path.join(j['output'], name + '.opafproj'))
+            paths.setdefault(j['path'], []).append(j)
+
+        # Variants of the same pattern without an id are told apart by job number
+        for p in list(paths):
+            if len(paths[p]) < 2:
+                continue
+
+            for j in paths.pop(p):
+                if not j['id']:
+                    root, ext = os.path.splitext(j['path'])
+                    j['path'] = root + '_' + str(j['index'] + 1) + ext
+
+                paths.setdefault(j['path'], []).append(j)
+
+        for p in paths:
+            if len(paths[p]) > 1:
+                raise Exception(
+                    "Batch jobs "
+                    + ", ".join(str(j['index'] + 1) for j in paths[p])
+                    + " write to the same output '" + p + "'"
+                )
+
+    @staticmethod
+    def load_manifest(path):
+        dir = os.path.dirname(os.path.abspath(path))
+
+        with open(path, 'r', encoding='UTF-8', newline='') as f:
+            if os.path.splitext(path)[1].lower() == '.csv':
+                jobs = list(csv.DictReader(f))
+            else:
+                jobs = json.load(f)
+
+        if not isinstance(jobs, list):
+            raise Exception("Batch manifest must contain a list of jobs")
+
+        # Paths are relative to the manifest
+        for j in jobs:
+            for f in ['package', 'output']:
+                if j.get(f):
+                    j[f] = os.path.join(dir, j[f])
+
+        return jobs
+
+    @staticmethod
+    def run_group(package, jobs):
+        results = []
+
+        # Parse package once for all jobs
+        start = time.perf_counter()
+
+        try:
+            opaf_doc = OPAFParser(package).parse()
+
+            if not opaf_doc.pkg_version:
+                raise Exception("'" + package + "' is not an OPAF package file")
+
+            error = None
+        except Exception as e:
+            error = str(e)
+
+        parse_time = time.perf_counter() - start
+
+        for j in jobs:
+            result = {
+                'index': j['index'],
+                'package': package,
+                'name': j['name'],
+                'output': None,
+                'status': 'error',
+                'error': error,
+                'parse_time': round(parse_time * 1000, 3),
+                'compile_time': None,
+            }
+
+            results.append(result)
+
+            if error:
+                continue
+
+            start = time.perf_counter()
+
+            try:
+                if not j['path']:
+                    raise Exception("Output path is not specified")
+
+                opaf_compiler = OPAFCompiler(
+                    opaf_doc,
+                    configs=j['configs'],
+                    colors=j['colors']
+                )
+                compiled_pattern = opaf_compiler.compile(j['name'])
+
+                os.makedirs(j['output'], exist_ok=True)
+
+                Utils.write_to_file(compiled_pattern, j['path'])
+
+                result['output'] = j['path']
+                result['status'] = 'ok'
+            except Exception as e:
+                result['error'] = str(e)
+
+            result['compile_time'] = round((time.perf_counter() - start) * 1000, 3)
+
+        return results
+
+    def run(self):
+        start = time.perf_counter()
+
+        # Group jobs so each package is only parsed once per worker
+        groups = {}
+
+        for j in self.jobs:
+            groups.setdefault(j['package'], []).append(j)
+
+        # Split large groups so variants of one package are compiled in parallel
+        workers = self.workers or os.cpu_count() or 1
+        chunk_size = max(1, math.ceil(len(self.jobs) / workers))
+        chunks = []
+
+        for p in groups:
+            for i in range(0, len(groups[p]), chunk_size):
+                chunks.append((p, groups[p][i:i + chunk_size]))
+
+        self.results = []
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(OPAFBatch.run_group, p, jobs): jobs for p, jobs in chunks
+            }
+
+            for f in as_completed(futures):
+                try:
+                    self.results += f.result()
+                except Exception as e:
+                    for j in futures[f]:
+                        self.results.append({
+                            'index': j['index'],
+                            'package': j['package'],
+                            'name': j['name'],
+                            'output': None,
+                            'status': 'error',
+                            'error': str(e),
+                            'parse_time': None,
+                            'compile_time': None,
+                        })
+
+        self.results.sort(key=lambda r: r['index'])
+
+        return self.get_summary(time.perf_counter() - start)
+
+    def get_summary(self, total_time):
+        failed = len([r for r in self.results if r['status'] != 'ok'])
+
+        return {
+            'jobs': len(self.results),
+            'packages': len(set(r['package'] for r in self.results)),
+            'succeeded': len(self.results) - failed,
+            'failed': failed,
+            'time': round(total_time * 1000, 3),
+            'results': self.results,
+        }
@@ -32,21 +32,24 @@ class OPAFBlock:
         self.elements = elements
         self.params = params
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None, elements=True):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("name", self.name)
 
         if len(self.params) > 0:
             node.setAttribute("params", Utils.params_to_str(self.params))
 
-        for e in self.elements:
-            element = parseString(e).documentElement
+        if elements:
+            for e in self.elements:
+                element = parseString(e).documentElement
 
-            if element.hasAttribute('xmlns:opaf'):
-                element.removeAttribute('xmlns:opaf')
+                if element.hasAttribute('xmlns:opaf'):
+                    element.removeAttribute('xmlns:opaf')
 
-            node.appendChild(element)
+                node.appendChild(element)
 
         return node
 
@@ -91,9 +94,10 @@ class OPAFBlock:
 
         # Elements
         Utils.check_node(node)
+        namespace = Utils.get_url('namespace')
 
         for child in node.childNodes:
-            child.setAttribute("xmlns:opaf", Utils.get_url('namespace'))
+            child.setAttribute("xmlns:opaf", namespace)
             elements.append(child.toxml())
 
         return OPAFBlock(name, elements, params)
@@ -0,0 +1,139 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import hashlib
+import json
+import os
+
+from opaf.lib import SPEC_VERSION, OPAFSnapshot, Utils
+
+
+class OPAFBuildCache:
+
+    EXTENSION = ".opafcache"
+    MANIFEST = "manifest.json"
+
+    def __init__(self, path, settings=None):
+        self.path = os.path.abspath(path)
+        self.tool_version = Utils.get_version() + "/" + SPEC_VERSION
+
+        # Results depend on settings such as image options
+        if settings:
+            self.tool_version += "/" + json.dumps(settings, sort_keys=True)
+        self.files = {}
+        self.hashes = {}
+        self.used = set()
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # Load fingerprints from previous builds
+        manifest_path = os.path.join(self.path, self.MANIFEST)
+
+        if os.path.isfile(manifest_path):
+            try:
+                with open(manifest_path, 'r', encoding='UTF-8') as f:
+                    manifest = json.load(f)
+            except ValueError:
+                manifest = {}
+
+            if manifest.get('tool_version') == self.tool_version:
+                self.files = manifest.get('files', {})
+
+    @staticmethod
+    def get_path(src_path):
+        return os.path.splitext(src_path)[0] + OPAFBuildCache.EXTENSION
+
+    def get_hash(self, path):
+        if path not in self.hashes:
+            digest = hashlib.sha256()
+
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+
+            self.hashes[path] = digest.hexdigest()
+
+        return self.hashes[path]
+
+    def __get_fragment_path(self, src_path):
+        name = hashlib.sha256(src_path.encode('utf-8')).hexdigest()
+
+        return os.path.join(self.path, name + ".opafsnap")
+
+    def get(self, src_path):
+        entry = self.files.get(src_path)
+
+        if entry is None:
+            return None
+
+        # Check source file and referenced images are unchanged
+        try:
+            if entry['hash'] != self.get_hash(src_path):
+                return None
+
+            for img_path, img_hash in entry['images'].items():
+                if img_hash != self.get_hash(img_path):
+                    return None
+
+            fragment = OPAFSnapshot.load(self.__get_fragment_path(src_path))
+        except Exception:
+            return None
+
+        self.used.add(src_path)
+
+        return fragment, entry['includes']
+
+    def get_images(self, src_path):
+        return list(self.files[src_path]['images'])
+
+    def put(self, src_path, fragment, includes, img_paths):
+        OPAFSnapshot.save(fragment, self.__get_fragment_path(src_path))
+
+        self.files[src_path] = {
+            'hash': self.get_hash(src_path),
+            'images': {p: self.get_hash(p) for p in img_paths},
+            'includes': includes,
+        }
+
+        self.used.add(src_path)
+
+    def save(self):
+        # Remove files which are no longer part of the build
+        for src_path in list(self.files):
+            if src_path not in self.used:
+                del self.files[src_path]
+
+                fragment_path = self.__get_fragment_path(src_path)
+
+                if os.path.isfile(fragment_path):
+                    os.remove(fragment_path)
+
+        manifest_path = os.path.join(self.path, self.MANIFEST)
+        tmp_path = manifest_path + ".tmp"
+
+        with open(tmp_path, 'w', encoding='UTF-8') as f:
+            json.dump(
+                {
+                    'tool_version': self.tool_version,
+                    'files': self.files,
+                },
+                f,
+                indent=2
+            )
+
+        os.replace(tmp_path, manifest_path)
+
+        # Hashes are recomputed for the next build
+        self.hashes = {}
+        self.used = set()
@@ -0,0 +1,341 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import hashlib
+import os
+import sqlite3
+import xml.dom
+
+from concurrent.futures import ThreadPoolExecutor
+from xml.dom.minidom import parseString
+
+from opaf.lib import (
+    OPAFColor,
+    OPAFComponent,
+    OPAFConfig,
+    OPAFPackageReader
+)
+from opaf.lib.metadata import MetadataUtils
+
+
+class OPAFCatalog:
+
+    FORMAT_VERSION = 1
+    EXTENSIONS = ('.opafpkg',)
+
+    __SCHEMA__ = """
+        CREATE TABLE IF NOT EXISTS packages (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            name TEXT,
+            version TEXT,
+            unique_id TEXT,
+            spec_version TEXT,
+            pkg_version TEXT
+        );
+        CREATE TABLE IF NOT EXISTS metadata (
+            package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+            node TEXT NOT NULL,
+            attribute TEXT NOT NULL,
+            value TEXT NOT NULL COLLATE NOCASE
+        );
+        CREATE TABLE IF NOT EXISTS configs (
+            package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            value TEXT NOT NULL COLLATE NOCASE,
+            is_default INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS colors (
+            package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS components (
+            package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+            name TEXT NOT NULL COLLATE NOCASE
+        );
+        CREATE INDEX IF NOT EXISTS metadata_value ON metadata(node, value);
+        CREATE INDEX IF NOT EXISTS configs_value ON configs(name, value);
+        CREATE INDEX IF NOT EXISTS colors_name ON colors(name);
+        CREATE INDEX IF NOT EXISTS components_name ON components(name);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+        # Rebuild databases written by other versions
+        if version != self.FORMAT_VERSION:
+            for table in ['metadata', 'configs', 'colors', 'components', 'packages']:
+                self.connection.execute("DROP TABLE IF EXISTS " + table)
+
+            self.connection.execute("PRAGMA user_version = %d" % self.FORMAT_VERSION)
+
+        self.connection.executescript(self.__SCHEMA__)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def get_hash(path):
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def __get_metadata_rows(node, rows):
+        for child in node.childNodes:
+            if child.nodeType != xml.dom.Node.ELEMENT_NODE:
+                continue
+
+            tag = child.localName
+            text = ''.join(
+                n.data for n in child.childNodes if n.nodeType == n.TEXT_NODE
+            ).strip()
+
+            if text:
+                rows.append((tag, '', text))
+
+            for i in range(child.attributes.length):
+                attr = child.attributes.item(i)
+                rows.append((tag, attr.name, attr.value))
+
+            if tag not in MetadataUtils.TEXT_NODES:
+                OPAFCatalog.__get_metadata_rows(child, rows)
+
+        return rows
+
+    @staticmethod
+    def read(path):
+        # Definitions are read from the package index without decoding images
+        with OPAFPackageReader(path) as reader:
+            root = reader.get_root()
+            metadata = []
+            configs = []
+            colors = []
+
+            opaf_metadata = reader.get_metadata()
+
+            if opaf_metadata:
+                for e in opaf_metadata.elements:
+                    node = parseString('<metadata>' + e + '</metadata>').documentElement
+                    OPAFCatalog.__get_metadata_rows(node, metadata)
+
+            for name in reader.get_names(OPAFConfig.__DEFINE_NAME__):
+                config = reader.get_config(name)
+                configs.append((name, str(config.value), 1))
+
+                for v in config.allowed_values:
+                    if v != str(config.value):
+                        configs.append((name, v, 0))
+
+            for name in reader.get_names(OPAFColor.__DEFINE_NAME__):
+                colors.append((name, reader.get_color(name).value or ''))
+
+            components = reader.get_names(OPAFComponent.__NAME__)
+
+        return {
+            'root': root,
+            'metadata': metadata,
+            'configs': configs,
+            'colors': colors,
+            'components': components,
+        }
+
+    def __get_paths(self, dirs):
+        paths = []
+
+        for dir in dirs:
+            for root, _, files in os.walk(dir):
+                for f in sorted(files):
+                    if os.path.splitext(f)[1] in self.EXTENSIONS:
+                        paths.append(os.path.abspath(os.path.join(root, f)))
+
+        return paths
+
+    def __check(self, path, known):
+        stat = os.stat(path)
+        state = (stat.st_mtime_ns, stat.st_size)
+        entry = known.get(path)
+
+        if entry and entry[1:3] == state:
+            return None
+
+        # Touched files are only indexed again when their content changed
+        hash = OPAFCatalog.get_hash(path)
+
+        if entry and entry[3] == hash:
+            return state, hash, None
+
+        return state, hash, OPAFCatalog.read(path)
+
+    def __add(self, path, state, hash, data):
+        c = self.connection
+        root = data['root']
+
+        c.execute("DELETE FROM packages WHERE path = ?", (path,))
+        package_id = c.execute(
+            "INSERT INTO packages (path, mtime_ns, size, hash, name, version, "
+            "unique_id, spec_version, pkg_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                state[0],
+                state[1],
+                hash,
+                root.get('name'),
+                root.get('version'),
+                root.get('unique_id'),
+                root.get('spec_version'),
+                root.get('pkg_version'),
+            )
+        ).lastrowid
+
+        c.executemany(
+            "INSERT INTO metadata VALUES (?, ?, ?, ?)",
+            [(package_id,) + r for r in data['metadata']]
+        )
+        c.executemany(
+            "INSERT INTO configs VALUES (?, ?, ?, ?)",
+            [(package_id,) + r for r in data['configs']]
+        )
+        c.executemany(
+            "INSERT INTO colors VALUES (?, ?, ?)",
+            [(package_id,) + r for r in data['colors']]
+        )
+        c.executemany(
+            "INSERT INTO components VALUES (?, ?)",
+            [(package_id, n) for n in data['components']]
+        )
+
+    def update(self, dirs, workers=None):
+        c = self.connection
+        paths = self.__get_paths(dirs)
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'errors': {}}
+
+        known = {}
+
+        for row in c.execute("SELECT path, mtime_ns, size, hash FROM packages"):
+            known[row[0]] = row
+
+        def check(path):
+            try:
+                return path, self.__check(path, known)
+            except Exception as e:
+                return path, e
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(check, paths))
+
+        for path, result in results:
+            if isinstance(result, Exception):
+                stats['errors'][path] = str(result)
+            elif result is None:
+                stats['unchanged'] += 1
+            elif result[2] is None:
+                c.execute(
+                    "UPDATE packages SET mtime_ns = ?, size = ? WHERE path = ?",
+                    (result[0][0], result[0][1], path)
+                )
+                stats['unchanged'] += 1
+            else:
+                self.__add(path, *result)
+
+                if path in known:
+                    stats['updated'] += 1
+                else:
+                    stats['added'] += 1
+
+        # Remove packages which no longer exist in the scanned directories
+        found = set(paths)
+        dirs = [os.path.join(os.path.abspath(d), '') for d in dirs]
+
+        for path in known:
+            if path not in found and any(path.startswith(d) for d in dirs):
+                c.execute("DELETE FROM packages WHERE path = ?", (path,))
+                stats['removed'] += 1
+
+        c.commit()
+
+        return stats
+
+    def find(self, metadata={}, configs={}, colors=[], components=[], name=None):
+        conditions = []
+        params = []
+
+        for node, value in metadata.items():
+            conditions.append(
+                "id IN (SELECT package_id FROM metadata WHERE node = ? AND value = ?)"
+            )
+            params += [node, value]
+
+        for config, value in configs.items():
+            conditions.append(
+                "id IN (SELECT package_id FROM configs WHERE name = ? AND value = ?)"
+            )
+            params += [config, str(value)]
+
+        for color in colors:
+            conditions.append("id IN (SELECT package_id FROM colors WHERE name = ?)")
+            params.append(color)
+
+        for component in components:
+            conditions.append(
+                "id IN (SELECT package_id FROM components WHERE name = ?)"
+            )
+            params.append(component)
+
+        if name is not None:
+            conditions.append("name LIKE ?")
+            params.append('%' + name + '%')
+
+        query = (
+            "SELECT path, name, version, unique_id, spec_version, pkg_version "
+            "FROM packages"
+        )
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY name, path"
+
+        keys = ['path', 'name', 'version', 'unique_id', 'spec_version', 'pkg_version']
+
+        return [dict(zip(keys, row)) for row in self.connection.execute(query, params)]
+
+    def get_values(self, node, attribute=''):
+        # Distinct values such as all yarns in the catalog
+        return [
+            row[0] for row in self.connection.execute(
+                "SELECT DISTINCT value FROM metadata WHERE node = ? AND attribute = ? "
+                "ORDER BY value",
+                (node, attribute)
+            )
+        ]
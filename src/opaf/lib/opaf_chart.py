@@ -37,21 +37,24 @@ class OPAFChart:
         self.rows = rows
         self.condition = condition
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None, elements=True):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("name", self.name)
 
         if self.condition is not None:
             node.setAttribute("condition", self.condition)
 
-        for r in self.rows:
-            row = parseString(r).documentElement
+        if elements:
+            for r in self.rows:
+                row = parseString(r).documentElement
 
-            if row.hasAttribute('xmlns:opaf'):
-                row.removeAttribute('xmlns:opaf')
+                if row.hasAttribute('xmlns:opaf'):
+                    row.removeAttribute('xmlns:opaf')
 
-            node.appendChild(row)
+                node.appendChild(row)
 
         return node
 
@@ -88,10 +91,11 @@ class OPAFChart:
 
         # Elements
         Utils.check_node(node, OPAFChart.CHART_NODES)
+        namespace = Utils.get_url('namespace')
 
         for child in node.childNodes:
             if child.localName == 'row':
-                child.setAttribute("xmlns:opaf", Utils.get_url('namespace'))
+                child.setAttribute("xmlns:opaf", namespace)
                 rows.append(child.toxml())
 
         return OPAFChart(name, rows, condition)
@@ -0,0 +1,127 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import xml.dom.minidom
+
+
+class OPAFChartGrid:
+
+    # Cell value used where a row is shorter than the widest row
+    EMPTY = 0
+
+    # Attributes describing how many stitches an action covers
+    __COUNT_ATTRS__ = [
+        'count',
+        'total',
+    ]
+
+    def __init__(self,
+                 name,
+                 grid,
+                 actions,
+                 rows):
+        self.name = name
+        self.grid = grid
+        self.actions = actions
+        self.rows = rows
+
+    def get_action_id(self, name, **attrs):
+        for i, a in enumerate(self.actions):
+            if a is not None and a['name'] == name and a['attrs'] == attrs:
+                return i
+
+        return None
+
+    def get_widths(self):
+        return (self.grid != self.EMPTY).sum(axis=1)
+
+    def get_counts(self):
+        import numpy
+
+        return numpy.bincount(self.grid.ravel(), minlength=len(self.actions))
+
+    @staticmethod
+    def __get_count(node):
+        if not node.hasAttribute('count'):
+            return 1
+
+        return int(float(node.getAttribute('count')))
+
+    @staticmethod
+    def __expand(node, actions, ids):
+        cells = []
+
+        for child in node.childNodes:
+            if child.nodeType != xml.dom.Node.ELEMENT_NODE:
+                continue
+
+            if child.tagName == 'action':
+                # Actions with the same attributes share an ID
+                attrs = {}
+
+                for name, value in child.attributes.items():
+                    if name != 'name' and name not in OPAFChartGrid.__COUNT_ATTRS__:
+                        attrs[name] = value
+
+                key = (child.getAttribute('name'), tuple(sorted(attrs.items())))
+
+                if key not in ids:
+                    ids[key] = len(actions)
+                    actions.append({'name': key[0], 'attrs': attrs})
+
+                cells += [ids[key]] * OPAFChartGrid.__get_count(child)
+
+            elif child.tagName == 'repeat':
+                cells += (
+                    OPAFChartGrid.__expand(child, actions, ids)
+                    * OPAFChartGrid.__get_count(child)
+                )
+
+        return cells
+
+    @staticmethod
+    def parse(node):
+        # Deferred as NumPy is an optional dependency
+        import numpy
+
+        if not isinstance(node, xml.dom.minidom.Node):
+            raise Exception("Unable to parse object of type " + node.__class__)
+
+        if not node.nodeType == xml.dom.Node.ELEMENT_NODE:
+            raise Exception("Unexpected node type")
+
+        if not node.nodeName == 'chart':
+            raise Exception(
+                "Expected node with name 'chart' and got '" + node.nodeName + "'"
+            )
+
+        actions = [None]
+        ids = {}
+        rows = []
+        cells = []
+
+        for child in node.childNodes:
+            if child.nodeType != xml.dom.Node.ELEMENT_NODE or child.tagName != 'row':
+                continue
+
+            rows.append(dict(child.attributes.items()))
+            cells.append(OPAFChartGrid.__expand(child, actions, ids))
+
+        width = max([len(c) for c in cells], default=0)
+        grid = numpy.full((len(cells), width), OPAFChartGrid.EMPTY, dtype=numpy.int32)
+
+        for i, c in enumerate(cells):
+            grid[i, :len(c)] = c
+
+        return OPAFChartGrid(node.getAttribute('name'), grid, actions, rows)
@@ -0,0 +1,196 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import hashlib
+import os
+
+from io import BytesIO
+
+from opaf.lib import OPAFColor
+
+
+class OPAFChartRenderer:
+
+    __DEFAULT_CELL_SIZE__ = 20
+    __DEFAULT_TILE_SIZE__ = 64
+    __BACKGROUND__ = '#ffffff'
+    __GRID_COLOR__ = '#a0a0a0'
+
+    def __init__(self, doc, colors={}, cell_size=None, cache=None):
+        if cell_size is None:
+            cell_size = OPAFChartRenderer.__DEFAULT_CELL_SIZE__
+
+        self.cell_size = cell_size
+        self.cache = cache
+        self.glyphs = {}
+
+        # Custom colors override pattern colors as when compiling
+        self.colors = {}
+        values = doc.get_opaf_colors()
+        values.update(colors)
+
+        for name, value in values.items():
+            try:
+                self.colors[name] = OPAFColor.to_hex(str(value).lower())
+            except Exception:
+                continue
+
+    @staticmethod
+    def __get_text_color(color):
+        r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+        if r * 299 + g * 587 + b * 114 > 128000:
+            return '#000000'
+
+        return '#ffffff'
+
+    def __get_glyph(self, action):
+        if action is None:
+            key = None
+        else:
+            key = (action['name'], tuple(sorted(action['attrs'].items())))
+
+        if key in self.glyphs:
+            return self.glyphs[key]
+
+        # Deferred so Pillow and NumPy are only loaded when rendering
+        import numpy
+
+        from PIL import Image, ImageDraw
+
+        size = self.cell_size
+        img = Image.new('RGB', (size, size), self.__BACKGROUND__)
+
+        # Empty cells are left blank
+        if action is not None:
+            color = self.colors.get(action['attrs'].get('color'), self.__BACKGROUND__)
+            text_color = self.__get_text_color(color)
+
+            draw = ImageDraw.Draw(img)
+            draw.rectangle(
+                (0, 0, size - 1, size - 1),
+                fill=color,
+                outline=self.__GRID_COLOR__
+            )
+
+            if action['name'] == 'purl':
+                r = max(1, size // 8)
+                c = size // 2
+                draw.ellipse((c - r, c - r, c + r, c + r), fill=text_color)
+            elif action['name'] != 'knit':
+                draw.text(
+                    (size / 2, size / 2),
+                    action['name'][:1].upper(),
+                    fill=text_color,
+                    anchor='mm'
+                )
+
+        self.glyphs[key] = numpy.asarray(img)
+
+        return self.glyphs[key]
+
+    def get_atlas(self, grid):
+        import numpy
+
+        if grid.grid.size == 0:
+            raise Exception("Chart '" + grid.name + "' has no stitches")
+
+        return numpy.stack([self.__get_glyph(a) for a in grid.actions])
+
+    def __get_signature(self, grid):
+        # Everything apart from cells which affects rendered pixels
+        signature = [str(self.cell_size)]
+
+        for a in grid.actions:
+            if a is None:
+                signature.append('')
+            else:
+                signature.append(
+                    a['name']
+                    + repr(sorted(a['attrs'].items()))
+                    + self.colors.get(a['attrs'].get('color'), '')
+                )
+
+        return '\0'.join(signature).encode('utf-8')
+
+    def __render(self, atlas, cells):
+        from PIL import Image
+
+        # Copy glyphs for all cells at once
+        rows, cols = cells.shape
+        size = self.cell_size
+        pixels = atlas[cells].transpose(0, 2, 1, 3, 4)
+        pixels = pixels.reshape(rows * size, cols * size, 3)
+
+        return Image.fromarray(pixels)
+
+    def render(self, grid):
+        # First row is at the bottom of the chart
+        return self.__render(self.get_atlas(grid), grid.grid[::-1])
+
+    def render_tiles(self, grid, tile_size=None):
+        from PIL import Image
+
+        if tile_size is None:
+            tile_size = OPAFChartRenderer.__DEFAULT_TILE_SIZE__
+
+        atlas = self.get_atlas(grid)
+        signature = self.__get_signature(grid)
+        cells = grid.grid[::-1]
+
+        for r in range(0, cells.shape[0], tile_size):
+            for c in range(0, cells.shape[1], tile_size):
+                tile = cells[r:r + tile_size, c:c + tile_size]
+
+                # Tiles are cached by content so unchanged areas are reused
+                key = None
+                data = None
+
+                if self.cache:
+                    key = hashlib.sha256(
+                        signature
+                        + b'\0' + repr(tile.shape).encode('utf-8')
+                        + b'\0' + tile.tobytes()
+                    ).hexdigest()
+                    data = self.cache.get(key)
+
+                if data is not None:
+                    img = Image.open(BytesIO(data))
+                else:
+                    img = self.__render(atlas, tile)
+
+                    if self.cache:
+                        img_file = BytesIO()
+                        img.save(img_file, 'PNG')
+                        self.cache.put(key, img_file.getvalue())
+
+                yield r // tile_size, c // tile_size, img
+
+    def save(self, grid, output_path, tile_size=None):
+        os.makedirs(output_path, exist_ok=True)
+        name = grid.name.strip().replace(' ', '_').lower()
+        paths = []
+
+        if tile_size is None:
+            path = os.path.join(output_path, name + '.png')
+            self.render(grid).save(path, 'PNG')
+
+            return [path]
+
+        for r, c, img in self.render_tiles(grid, tile_size):
+            path = os.path.join(output_path, '%s_%d_%d.png' % (name, r, c))
+            img.save(path, 'PNG')
+            paths.append(path)
+
+        return paths
@@ -39,8 +39,10 @@ class OPAFColor:
         self.value = value
         self.description = description
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("name", self.name)
         node.setAttribute("value", self.value)
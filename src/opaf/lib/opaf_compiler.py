@@ -21,7 +21,9 @@ from xml.dom.minidom import parseString
 
 from opaf.lib import (
     SPEC_VERSION,
+    OPAFChartGrid,
     OPAFColor,
+    OPAFIndex,
     Utils
 )
 
@@ -34,12 +36,39 @@ class OPAFCompiler:
         'name',
     ]
 
-    def __init__(self, doc, configs={}, colors={}):
+    def __init__(self,
+                 doc,
+                 configs={},
+                 colors={},
+                 progress=None,
+                 cancel=None,
+                 count_stitches=False,
+                 index=False):
         self.opaf_doc = doc
         self.compiled_doc = xml.dom.minidom.Document()
         self.custom_config = configs
         self.custom_colors = colors
         self.global_values = {}
+        self.progress = progress
+        self.cancel = cancel
+        self.chart_grids = {}
+        self.count_stitches = count_stitches
+        self.stitch_counts = {}
+        self.block_counts = {}
+        self.stitch_report = []
+        self.current_parent = None
+        self.row_range = None
+        self.row_index = 0
+        self.index = index
+        self.project_index = None
+
+    def __set_stitch_count(self, node, count):
+        # Node is kept so its ID is not reused during compilation
+        self.stitch_counts[id(node)] = (node, count)
+
+    def __check_cancelled(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise Exception("Compilation cancelled")
 
     def __process_configs(self, parent):
         for c in self.opaf_doc.opaf_configs:
@@ -93,8 +122,11 @@ class OPAFCompiler:
                 )
             )
 
-    def __process_colors(self, parent):
+    def __process_colors(self, parent, names=None, before=None):
         for c in self.opaf_doc.opaf_colors:
+            if names is not None and c.name not in names:
+                continue
+
             color_element = self.compiled_doc.createElement('color')
             color_element.setAttribute('name', c.name)
 
@@ -106,10 +138,13 @@ class OPAFCompiler:
 
             color_element.setAttribute('value', value)
 
-            parent.appendChild(color_element)
+            parent.insertBefore(color_element, before)
 
-    def __process_charts(self, parent):
+    def __process_charts(self, parent, names=None):
         for chart in self.opaf_doc.opaf_charts:
+            if names is not None and chart.name not in names:
+                continue
+
             # Check condition
             if chart.condition:
                 if not Utils.evaluate_condition(chart.condition, self.global_values):
@@ -120,6 +155,8 @@ class OPAFCompiler:
             chart_element = self.compiled_doc.createElement('chart')
             chart_element.setAttribute('name', chart.name)
 
+            self.current_parent = ('chart', chart.name, [0])
+
             for r in chart.rows:
                 row = parseString(r).documentElement
                 chart_nodes += self.__process_opaf_node(row, self.global_values)
@@ -147,6 +184,10 @@ class OPAFCompiler:
         for child in node.childNodes:
             nodes += self.__process_opaf_node(child, values)
 
+        # Instructions without rows in the requested range are left out
+        if self.row_range is not None and not nodes:
+            return []
+
         for n in nodes:
             new_element.appendChild((n.cloneNode(deep=True)))
 
@@ -182,9 +223,24 @@ class OPAFCompiler:
         for n in nodes:
             new_element.appendChild((n.cloneNode(deep=True)))
 
+        if self.count_stitches:
+            self.__set_stitch_count(
+                new_element,
+                int(float(new_element.getAttribute('count')))
+                * Utils.get_stitch_count(nodes, self.stitch_counts)
+            )
+
         return [new_element]
 
     def __process_opaf_row(self, node, values):
+        # Skip rows outside the requested range
+        if self.row_range is not None:
+            index = self.row_index
+            self.row_index += 1
+
+            if index < self.row_range[0] or index >= self.row_range[1]:
+                return []
+
         new_element = self.compiled_doc.createElement('row')
 
         # Check type attribute
@@ -211,11 +267,36 @@ class OPAFCompiler:
         for child in node.childNodes:
             nodes += self.__process_opaf_node(child, values)
 
+        if self.count_stitches:
+            self.__check_row(new_element, nodes)
+
         for n in nodes:
             new_element.appendChild((n.cloneNode(deep=True)))
 
         return [new_element]
 
+    def __check_row(self, row, nodes):
+        count = Utils.get_stitch_count(nodes, self.stitch_counts)
+        row.setAttribute('stitch_count', str(count))
+
+        expected = None
+
+        if row.hasAttribute('expected_count'):
+            expected = int(float(row.getAttribute('expected_count')))
+
+        # Rows are numbered within each chart or component
+        type, name, index = self.current_parent or (None, None, [0])
+        index[0] += 1
+
+        self.stitch_report.append({
+            'type': type,
+            'name': name,
+            'row': index[0],
+            'count': count,
+            'expected': expected,
+            'valid': expected is None or expected == count,
+        })
+
     def __process_opaf_action(self, node, values):
         # Get action object
         name = node.getAttribute('name')
@@ -311,6 +392,8 @@ class OPAFCompiler:
         return [new_element]
 
     def __process_opaf_block(self, node, values):
+        self.__check_cancelled()
+
         # Get block object
         name = node.getAttribute('name')
         block = self.opaf_doc.get_opaf_block(name)
@@ -355,6 +438,20 @@ class OPAFCompiler:
             element = parseString(e).documentElement
             nodes += self.__process_opaf_node(element, params)
 
+        if self.count_stitches:
+            # Identical expansions of a block have identical counts
+            key = (name, Utils.params_to_str(params))
+            counts = self.block_counts.get(key)
+
+            if counts is None:
+                counts = [
+                    Utils.get_stitch_count([n], self.stitch_counts) for n in nodes
+                ]
+                self.block_counts[key] = counts
+
+            for n, c in zip(nodes, counts):
+                self.__set_stitch_count(n, c)
+
         return nodes
 
     def __process_opaf_text(self, node, values):
@@ -403,6 +500,8 @@ class OPAFCompiler:
         component_element.setAttribute("name", component.name)
         component_element.setAttribute("unique_id", component.uid)
 
+        self.current_parent = ('component', component.name, [0])
+
         compiled_nodes = []
 
         for e in component.elements:
@@ -414,7 +513,7 @@ class OPAFCompiler:
 
         return component_element
 
-    def compile(self, name):
+    def __process_root(self, name):
         if not self.opaf_doc:
             raise Exception("OPAF document is not set. Nothing to compile")
 
@@ -429,19 +528,23 @@ class OPAFCompiler:
 
         self.compiled_doc.appendChild(root_element)
 
-        # Images
-        if self.opaf_doc.opaf_images:
-            for i in self.opaf_doc.opaf_images:
-                image_element = self.compiled_doc.createElement("image")
-                image_element.setAttribute("name", i.name)
-                image_element.setAttribute(
-                    "data",
-                    base64.b64encode(i.data).decode('ascii')
-                )
+        return root_element
 
-                root_element.appendChild(image_element)
+    def __process_images(self, parent, names=None, before=None):
+        for i in self.opaf_doc.opaf_images:
+            if names is not None and i.name not in names:
+                continue
 
-        # Pattern
+            image_element = self.compiled_doc.createElement("image")
+            image_element.setAttribute("name", i.name)
+            image_element.setAttribute(
+                "data",
+                base64.b64encode(i.data).decode('ascii')
+            )
+
+            parent.insertBefore(image_element, before)
+
+    def __process_pattern(self, parent):
         pattern_element = self.compiled_doc.createElement("pattern")
         pattern_element.setAttribute("unique_id", self.opaf_doc.unique_id)
         pattern_element.setAttribute("name", self.opaf_doc.name)
@@ -457,7 +560,32 @@ class OPAFCompiler:
 
             pattern_element.appendChild(metadata_element)
 
-        root_element.appendChild(pattern_element)
+        parent.appendChild(pattern_element)
+
+        return pattern_element
+
+    def __get_result(self):
+        self.stitch_counts = {}
+
+        result = self.compiled_doc.toxml()
+
+        # Offsets are for the project written as UTF-8
+        if self.index:
+            self.project_index = OPAFIndex.build(
+                result.encode('utf-8'),
+                nested=OPAFIndex.PROJECT_NESTED
+            )
+
+        return result
+
+    def compile(self, name):
+        root_element = self.__process_root(name)
+
+        # Images
+        self.__process_images(root_element)
+
+        # Pattern
+        self.__process_pattern(root_element)
 
         # Evaluate global values
         self.__process_configs(root_element)
@@ -470,7 +598,11 @@ class OPAFCompiler:
         self.__process_charts(root_element)
 
         # Process components
-        for component in self.opaf_doc.opaf_components:
+        total = len(self.opaf_doc.opaf_components)
+
+        for index, component in enumerate(self.opaf_doc.opaf_components):
+            self.__check_cancelled()
+
             if component.condition:
                 if not Utils.evaluate_condition(component.condition, self.global_values):
                     continue
@@ -478,4 +610,110 @@ class OPAFCompiler:
             component_element = self.__process_component(component)
             root_element.appendChild(component_element)
 
-        return self.compiled_doc.toxml()
+            if self.progress:
+                self.progress(component.name, index + 1, total)
+
+        return self.__get_result()
+
+    def compile_component(self, name, component, start=None, stop=None):
+        opaf_component = None
+
+        for c in self.opaf_doc.opaf_components:
+            if c.name == component:
+                opaf_component = c
+                break
+
+        if opaf_component is None:
+            raise Exception("Component '" + component + "' not found")
+
+        for bound in [start, stop]:
+            if bound is not None and bound < 0:
+                raise Exception("Row range bounds can not be negative")
+
+        if start is not None and stop is not None and start >= stop:
+            raise Exception("Row range " + str(start) + ":" + str(stop) + " is empty")
+
+        root_element = self.__process_root(name)
+        pattern_element = self.__process_pattern(root_element)
+
+        # Evaluate global values
+        self.__process_configs(root_element)
+        self.__process_values(root_element)
+
+        if opaf_component.condition:
+            if not Utils.evaluate_condition(opaf_component.condition, self.global_values):
+                raise Exception("Component '" + component + "' is not included by config")
+
+        # Rows are numbered from zero across all instructions of the component
+        if start is not None or stop is not None:
+            self.row_range = (start or 0, stop if stop is not None else math.inf)
+            self.row_index = 0
+
+        try:
+            component_element = self.__process_component(opaf_component)
+        finally:
+            self.row_range = None
+
+        # Only add charts referenced by rows of the component
+        charts = set()
+
+        for n in component_element.getElementsByTagName('row'):
+            if n.hasAttribute('chart'):
+                charts.add(n.getAttribute('chart'))
+
+        self.__process_charts(root_element, charts)
+
+        chart_elements = [
+            n for n in root_element.childNodes if n.nodeName == 'chart'
+        ]
+
+        # Only add colors and images used by the component and its charts
+        colors = set()
+        images = set()
+
+        for e in [component_element] + chart_elements:
+            for n in e.getElementsByTagName('*'):
+                if n.hasAttribute('color'):
+                    colors.add(n.getAttribute('color'))
+
+                if n.tagName == 'image':
+                    images.add(n.getAttribute('name'))
+
+        for n in pattern_element.getElementsByTagName('image'):
+            if n.hasAttribute('name'):
+                images.add(n.getAttribute('name'))
+
+        self.__process_images(root_element, images, before=pattern_element)
+        self.__process_colors(
+            root_element,
+            colors,
+            before=chart_elements[0] if chart_elements else None
+        )
+
+        root_element.appendChild(component_element)
+
+        return self.__get_result()
+
+    def get_chart_names(self):
+        if not self.compiled_doc.documentElement:
+            raise Exception("OPAF project has not been compiled")
+
+        return [
+            n.getAttribute('name')
+            for n in self.compiled_doc.documentElement.childNodes
+            if n.nodeName == 'chart'
+        ]
+
+    def get_chart_grid(self, name):
+        if name in self.chart_grids:
+            return self.chart_grids[name]
+
+        if not self.compiled_doc.documentElement:
+            raise Exception("OPAF project has not been compiled")
+
+        for node in self.compiled_doc.documentElement.childNodes:
+            if node.nodeName == 'chart' and node.getAttribute('name') == name:
+                self.chart_grids[name] = OPAFChartGrid.parse(node)
+                return self.chart_grids[name]
+
+        raise Exception("Chart '" + name + "' not found in compiled project")
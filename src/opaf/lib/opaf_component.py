@@ -34,8 +34,10 @@ class OPAFComponent:
         self.elements = elements
         self.condition = condition
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None, elements=True):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__NAME__)
         node.setAttribute("name", self.name)
         node.setAttribute("unique_id", self.uid)
@@ -43,13 +45,14 @@ class OPAFComponent:
         if self.condition is not None:
             node.setAttribute("condition", self.condition)
 
-        for e in self.elements:
-            element = parseString(e).documentElement
+        if elements:
+            for e in self.elements:
+                element = parseString(e).documentElement
 
-            if element.hasAttribute('xmlns:opaf'):
-                element.removeAttribute('xmlns:opaf')
+                if element.hasAttribute('xmlns:opaf'):
+                    element.removeAttribute('xmlns:opaf')
 
-            node.appendChild(element)
+                node.appendChild(element)
 
         return node
 
@@ -89,9 +92,10 @@ class OPAFComponent:
 
         # Elements
         Utils.check_node(node)
+        namespace = Utils.get_url('namespace')
 
         for child in node.childNodes:
-            child.setAttribute("xmlns:opaf", Utils.get_url('namespace'))
+            child.setAttribute("xmlns:opaf", namespace)
             elements.append(child.toxml())
 
         return OPAFComponent(name, uid=uid, elements=elements, condition=condition)
@@ -34,8 +34,10 @@ class OPAFConfig:
         self.title = title
         self.description = description
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("name", self.name)
         node.setAttribute("value", self.value)
@@ -85,7 +87,7 @@ class OPAFConfig:
         allowed_values = []
         if node.hasAttribute('allowed_values'):
             allowed_values = node.getAttribute('allowed_values').split(',')
-            allowed_values = map(str.strip, allowed_values)
+            allowed_values = list(map(str.strip, allowed_values))
 
         # Title
         title = None
@@ -12,6 +12,8 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+from opaf.lib import OPAFBlock, OPAFImage
+
 
 class OPAFDocument:
     def __init__(self):
@@ -64,6 +66,12 @@ class OPAFDocument:
 
         self.opaf_images.append(image)
 
+    def add_opaf_image_alias(self, name, alias):
+        image = self.get_opaf_image(alias)
+
+        # Alias shares image data with the original definition
+        self.add_opaf_image(OPAFImage(name, image.data))
+
     def add_opaf_chart(self, chart):
         # Check for duplicates
         for c in self.opaf_charts:
@@ -80,6 +88,12 @@ class OPAFDocument:
 
         self.opaf_blocks.append(block)
 
+    def add_opaf_block_alias(self, name, alias):
+        block = self.get_opaf_block(alias)
+
+        # Alias shares elements and parameters with the original definition
+        self.add_opaf_block(OPAFBlock(name, block.elements, block.params))
+
     def add_opaf_action(self, action):
         # Check for duplicates
         for a in self.opaf_actions:
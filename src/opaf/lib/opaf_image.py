@@ -16,7 +16,6 @@ import base64
 import xml.dom.minidom
 
 from io import BytesIO
-from PIL import Image
 
 from opaf.lib import Utils
 
@@ -25,6 +24,46 @@ class OPAFImage:
 
     __DEFINE_NAME__ = "opaf:define_image"
     __DEFAULT_SIZE__ = 1000
+    __JPEG_QUALITY__ = 75
+    __MIN_QUALITY__ = 20
+    __MIN_FIT_SIZE__ = 32
+
+    OUTPUT_FORMATS = [
+        'png',
+        'jpeg',
+        'webp',
+        'avif',
+    ]
+
+    # Image settings which can be set by define_image attributes
+    OPTIONS = [
+        'format',
+        'quality',
+        'max_bytes',
+    ]
+
+    __FORMATS__ = {
+        b'\x89PNG\r\n\x1a\n': 'png',
+        b'\xff\xd8\xff': 'jpeg',
+        b'GIF87a': 'gif',
+        b'GIF89a': 'gif',
+    }
+
+    __EXTENSIONS__ = {
+        'png': '.png',
+        'jpeg': '.jpg',
+        'gif': '.gif',
+        'webp': '.webp',
+        'avif': '.avif',
+    }
+
+    # Pillow format names used when transcoding
+    __TRANSCODE_FORMATS__ = {
+        'png': 'PNG',
+        'jpeg': 'JPEG',
+        'webp': 'WEBP',
+        'avif': 'AVIF',
+    }
 
     def __init__(self,
                  name,
@@ -32,16 +71,152 @@ class OPAFImage:
         self.name = name
         self.data = data
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, entry=None, doc=None, data=True):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("name", self.name)
-        node.setAttribute("data", base64.b64encode(self.data).decode('ascii'))
+
+        # Reference archive entry instead of embedding image data
+        if entry:
+            node.setAttribute("entry", entry)
+        elif data:
+            node.setAttribute("data", base64.b64encode(self.data).decode('ascii'))
 
         return node
 
+    def get_format(self):
+        for magic, fmt in self.__FORMATS__.items():
+            if self.data.startswith(magic):
+                return fmt
+
+        if self.data[:4] == b'RIFF' and self.data[8:12] == b'WEBP':
+            return 'webp'
+
+        if self.data[4:12] in (b'ftypavif', b'ftypavis'):
+            return 'avif'
+
+        return None
+
+    def get_extension(self):
+        return self.__EXTENSIONS__.get(self.get_format(), '.bin')
+
+    @staticmethod
+    def is_format_supported(format):
+        from PIL import Image
+
+        # Encoders such as AVIF depend on how Pillow was built
+        Image.init()
+
+        return OPAFImage.__TRANSCODE_FORMATS__.get(format) in Image.SAVE
+
     @staticmethod
-    def parse(node, dir):
+    def encode(img, format=None, quality=None):
+        if quality is None:
+            quality = OPAFImage.__JPEG_QUALITY__
+
+        # Default to PNG for transparent images and JPEG otherwise
+        if format is None:
+            if img.has_transparency_data:
+                format = 'png'
+            else:
+                format = 'jpeg'
+
+        if format not in OPAFImage.__TRANSCODE_FORMATS__:
+            raise Exception("Unsupported image format '" + format + "'")
+
+        if not OPAFImage.is_format_supported(format):
+            raise Exception("Image format '" + format + "' is not supported by Pillow")
+
+        # JPEG does not support transparency
+        if format == 'jpeg' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        # Metadata of the source image such as EXIF or ICC profiles is not copied
+        metadata = {'icc_profile': None, 'exif': b'', 'comment': b''}
+        img_file = BytesIO()
+
+        if format == 'png':
+            img.save(img_file, 'PNG', **metadata)
+        else:
+            img.save(
+                img_file,
+                OPAFImage.__TRANSCODE_FORMATS__[format],
+                quality=quality,
+                **metadata
+            )
+
+        return img_file.getvalue()
+
+    @staticmethod
+    def fit(img, format=None, quality=None, max_bytes=None):
+        if quality is None:
+            quality = OPAFImage.__JPEG_QUALITY__
+
+        data = OPAFImage.encode(img, format, quality)
+
+        if max_bytes is None or len(data) <= max_bytes:
+            return data
+
+        lossy = format != 'png' and not (format is None and img.has_transparency_data)
+
+        # Find the highest quality within budget
+        if lossy:
+            best = None
+            low = OPAFImage.__MIN_QUALITY__
+            high = quality - 1
+
+            while low <= high:
+                mid = (low + high) // 2
+                candidate = OPAFImage.encode(img, format, mid)
+
+                if len(candidate) <= max_bytes:
+                    best = candidate
+                    low = mid + 1
+                else:
+                    high = mid - 1
+
+            if best is not None:
+                return best
+
+            quality = OPAFImage.__MIN_QUALITY__
+
+        # Reduce dimensions until the image fits
+        while max(img.size) > OPAFImage.__MIN_FIT_SIZE__:
+            img = img.resize(
+                (max(1, img.width * 3 // 4), max(1, img.height * 3 // 4))
+            )
+            data = OPAFImage.encode(img, format, quality)
+
+            if len(data) <= max_bytes:
+                break
+
+        return data
+
+    @staticmethod
+    def process(img_path, size, format=None, quality=None, max_bytes=None):
+        # Deferred so Pillow is only loaded when images are processed
+        from PIL import Image
+
+        img = Image.open(img_path)
+        img.thumbnail((size, size))
+
+        return OPAFImage.fit(img, format, quality, max_bytes)
+
+    @staticmethod
+    def transcode(data, format=None, size=None, quality=None, max_bytes=None):
+        from PIL import Image
+
+        img = Image.open(BytesIO(data))
+
+        if size:
+            img.thumbnail((size, size))
+
+        return OPAFImage.fit(img, format, quality, max_bytes)
+
+    @staticmethod
+    def parse(node, dir, cache=None, archive=None, options=None):
         if not isinstance(node, xml.dom.minidom.Node):
             raise Exception("Unable to parse object of type " + node.__class__)
 
@@ -66,6 +241,28 @@ class OPAFImage:
         if node.hasAttribute("size"):
             size = int(node.getAttribute("size"))
 
+        # Image settings override defaults
+        options = dict(options or {})
+
+        for o in OPAFImage.OPTIONS:
+            if node.hasAttribute(o):
+                options[o] = node.getAttribute(o)
+
+        format = options.get('format') or None
+
+        if format is not None and format not in OPAFImage.__TRANSCODE_FORMATS__:
+            raise Exception("Unsupported image format '" + format + "'")
+
+        quality = options.get('quality')
+
+        if quality is not None:
+            quality = int(quality)
+
+        max_bytes = options.get('max_bytes')
+
+        if max_bytes is not None:
+            max_bytes = int(max_bytes)
+
         # URI
         if node.hasAttribute("uri"):
             uri = node.getAttribute("uri")
@@ -74,17 +271,31 @@ class OPAFImage:
             if not img_path:
                 raise Exception("Image not found with uri： %s" % uri)
 
-            img = Image.open(img_path)
-            img.thumbnail((size, size))
+            if cache:
+                params = [
+                    size,
+                    format.upper() if format else 'PNG/JPEG',
+                    quality or OPAFImage.__JPEG_QUALITY__
+                ]
 
-            img_file = BytesIO()
+                if max_bytes is not None:
+                    params.append(max_bytes)
 
-            if img.has_transparency_data:
-                img.save(img_file, 'PNG')
+                key = cache.get_key(img_path, *params)
+                data = cache.get(key)
+
+                if data is None:
+                    data = OPAFImage.process(img_path, size, format, quality, max_bytes)
+                    cache.put(key, data)
             else:
-                img.save(img_file, 'JPEG', quality=75)
+                data = OPAFImage.process(img_path, size, format, quality, max_bytes)
+        elif node.hasAttribute("entry"):
+            entry = node.getAttribute("entry")
+
+            if archive is None:
+                raise Exception("Image entry '%s' requires an OPAF archive" % entry)
 
-            data = img_file.getvalue()
+            data = archive.read(entry)
         else:
             data = base64.b64decode(node.getAttribute("data"))
 
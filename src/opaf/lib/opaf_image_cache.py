@@ -0,0 +1,162 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class OPAFImageCache:
+
+    __DEFAULT_MAX_SIZE__ = 512 * 1024 * 1024
+    __CHUNK_SIZE__ = 1024 * 1024
+    __EXTENSION__ = ".bin"
+
+    def __init__(self,
+                 path=None,
+                 max_size=None):
+        if path is None:
+            path = OPAFImageCache.get_default_path()
+
+        if max_size is None:
+            max_size = OPAFImageCache.__DEFAULT_MAX_SIZE__
+
+        self.path = os.path.abspath(path)
+        self.max_size = max_size
+        self.size = None
+        self.lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def get_default_path():
+        cache_home = os.environ.get(
+            "XDG_CACHE_HOME",
+            os.path.join(os.path.expanduser("~"), ".cache")
+        )
+
+        return os.path.join(cache_home, "opaf", "images")
+
+    def get_key(self, src_path, *params):
+        key = hashlib.sha256()
+
+        # Hash source file contents
+        with open(src_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.__CHUNK_SIZE__), b""):
+                key.update(chunk)
+
+        # Add processing parameters
+        for p in params:
+            key.update(b"\0" + str(p).encode("utf-8"))
+
+        return key.hexdigest()
+
+    def __get_path(self, key):
+        return os.path.join(self.path, key[:2], key + self.__EXTENSION__)
+
+    def get(self, key):
+        path = self.__get_path(key)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+
+            # Mark entry as recently used
+            os.utime(path)
+        except OSError:
+            return None
+
+        return data
+
+    def put(self, key, data):
+        path = self.__get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+
+            # Replaced entries no longer count towards the cache size
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+            raise
+
+        with self.lock:
+            if self.size is None:
+                self.size = self.__get_entries()[1]
+            else:
+                self.size += len(data) - old_size
+
+            if self.size > self.max_size:
+                self.__evict()
+
+    def __get_entries(self):
+        entries = []
+        size = 0
+
+        for root, dirs, files in os.walk(self.path):
+            for f in files:
+                if not f.endswith(self.__EXTENSION__):
+                    continue
+
+                path = os.path.join(root, f)
+
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, path))
+                size += stat.st_size
+
+        return entries, size
+
+    def __evict(self):
+        entries, size = self.__get_entries()
+
+        # Remove least recently used entries first
+        for mtime, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            size -= entry_size
+
+        self.size = size
+
+    def clear(self):
+        with self.lock:
+            for mtime, entry_size, path in self.__get_entries()[0]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+
+            self.size = 0
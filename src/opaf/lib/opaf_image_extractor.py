@@ -0,0 +1,136 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import xml.parsers.expat
+import zipfile
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from opaf.lib import OPAFImage, OPAFPackager
+
+
+class OPAFImageExtractor:
+
+    def __init__(self, images, workers=None):
+        self.images = images
+        self.workers = workers
+
+    @staticmethod
+    def __get_path(output_path, file_name):
+        output_path = os.path.abspath(output_path)
+        path = os.path.abspath(os.path.join(output_path, file_name))
+
+        # Image names come from the package so must not leave the output directory
+        if os.path.dirname(path) != output_path:
+            raise Exception("Invalid image file name '" + file_name + "'")
+
+        return path
+
+    @staticmethod
+    def __write(image):
+        with open(image[0], 'wb') as f:
+            f.write(image[1])
+
+        return image[0]
+
+    def extract(self, output_path, format=None, size=None, quality=None):
+        os.makedirs(output_path, exist_ok=True)
+
+        images = []
+
+        if format is None and not size:
+            # Write stored image data using the sniffed format
+            for i in self.images:
+                images.append(
+                    (self.__get_path(output_path, i.name + i.get_extension()), i.data)
+                )
+        else:
+            formats = [format] * len(self.images)
+
+            # Resized images keep their format where it can be written
+            if format is None:
+                formats = [
+                    i.get_format() if i.get_format() in OPAFImage.OUTPUT_FORMATS else None
+                    for i in self.images
+                ]
+
+            # Transcoding is CPU bound so runs in separate processes
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                data = executor.map(
+                    OPAFImage.transcode,
+                    [i.data for i in self.images],
+                    formats,
+                    [size] * len(self.images),
+                    [quality] * len(self.images)
+                )
+
+                for i, d in zip(self.images, data):
+                    name = i.name + OPAFImage(i.name, d).get_extension()
+                    images.append((self.__get_path(output_path, name), d))
+
+        # Writes release the GIL so can run concurrently
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(OPAFImageExtractor.__write, images))
+
+    @staticmethod
+    def __get_archive_entries(data):
+        entries = {}
+        aliases = {}
+
+        def start_element(tag, attrs):
+            if tag != OPAFImage.__DEFINE_NAME__:
+                return
+
+            if 'entry' in attrs:
+                entries[attrs['name']] = attrs['entry']
+            elif 'alias' in attrs:
+                aliases[attrs['name']] = attrs['alias']
+
+        parser = xml.parsers.expat.ParserCreate()
+        parser.StartElementHandler = start_element
+        parser.Parse(data, True)
+
+        # Deduplicated images share the entry of the image they alias
+        for name, alias in aliases.items():
+            if alias in entries:
+                entries[name] = entries[alias]
+
+        return entries
+
+    @staticmethod
+    def extract_archive(path, output_path):
+        os.makedirs(output_path, exist_ok=True)
+
+        # Copy image entries without decoding the package
+        with zipfile.ZipFile(path) as archive:
+            entries = OPAFImageExtractor.__get_archive_entries(
+                archive.read(OPAFPackager.ARCHIVE_PATTERN)
+            )
+
+            # Check every name before writing any files
+            paths = [
+                OPAFImageExtractor.__get_path(
+                    output_path,
+                    name + os.path.splitext(entry)[1]
+                )
+                for name, entry in entries.items()
+            ]
+
+            for img_path, entry in zip(paths, entries.values()):
+                with archive.open(entry) as src, open(img_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+
+        return paths
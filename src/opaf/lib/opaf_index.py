@@ -0,0 +1,201 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import hashlib
+import json
+import os
+import xml.parsers.expat
+
+
+class OPAFIndex:
+
+    EXTENSION = ".opafidx"
+    FORMAT_VERSION = 2
+
+    # Bytes hashed at each end of the file to detect same size edits
+    __SAMPLE_SIZE__ = 64 * 1024
+
+    # Elements indexed below the top level of compiled projects
+    PROJECT_NESTED = ('row',)
+
+    def __init__(self,
+                 size=0,
+                 root=None,
+                 entries=None,
+                 mtime=None,
+                 digest=None):
+        self.size = size
+        self.mtime = mtime
+        self.digest = digest
+        self.root = root if root is not None else {}
+        self.entries = entries if entries is not None else []
+
+    @staticmethod
+    def get_path(path):
+        return path + OPAFIndex.EXTENSION
+
+    @staticmethod
+    def get_fingerprint(path):
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as f:
+            if stat.st_size <= 2 * OPAFIndex.__SAMPLE_SIZE__:
+                digest.update(f.read())
+            else:
+                digest.update(f.read(OPAFIndex.__SAMPLE_SIZE__))
+                f.seek(-OPAFIndex.__SAMPLE_SIZE__, os.SEEK_END)
+                digest.update(f.read())
+
+        return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+    @staticmethod
+    def build(data, nested=()):
+        index = OPAFIndex(size=len(data))
+
+        # Open elements as [tag, name, offset, entry index, has content]
+        stack = []
+
+        parser = xml.parsers.expat.ParserCreate()
+        parser.buffer_text = True
+
+        def start_element(tag, attrs):
+            if stack:
+                stack[-1][4] = True
+
+            depth = len(stack)
+            entry = None
+
+            if depth == 0:
+                index.root = attrs
+            elif depth == 1 or tag in nested:
+                # Record parent top level element for nested entries
+                parent = None
+
+                if depth > 1:
+                    parent = stack[1][3]
+
+                entry = len(index.entries)
+                index.entries.append(
+                    [tag, attrs.get('name'), parser.CurrentByteIndex, 0, parent]
+                )
+
+            stack.append([tag, attrs.get('name'), parser.CurrentByteIndex, entry, False])
+
+        def end_element(tag):
+            tag, name, offset, entry, has_content = stack.pop()
+
+            if entry is None:
+                return
+
+            end = parser.CurrentByteIndex
+
+            # Empty element tags report the position after the tag
+            if has_content or data[end - 2:end] != b'/>':
+                end = data.find(b'>', end) + 1
+
+            index.entries[entry][3] = end - offset
+
+        def content(*args):
+            if stack:
+                stack[-1][4] = True
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = content
+        parser.CommentHandler = content
+        parser.ProcessingInstructionHandler = content
+
+        parser.Parse(data, True)
+
+        return index
+
+    def find(self, tag, name=None):
+        for e in self.entries:
+            if e[0] == tag and (name is None or e[1] == name):
+                return e
+
+        if name is None:
+            raise Exception("Element '" + tag + "' not found in index")
+
+        raise Exception(
+            "Element '" + tag + "' with name '" + name + "' not found in index"
+        )
+
+    def get_names(self, tag):
+        return [e[1] for e in self.entries if e[0] == tag]
+
+    def get_children(self, tag, name, child_tag):
+        parent = self.entries.index(self.find(tag, name))
+
+        return [e for e in self.entries if e[4] == parent and e[0] == child_tag]
+
+    def save(self, path):
+        with open(path, 'w', encoding='UTF-8') as f:
+            json.dump(
+                {
+                    'format': self.FORMAT_VERSION,
+                    'size': self.size,
+                    'mtime': self.mtime,
+                    'digest': self.digest,
+                    'root': self.root,
+                    'entries': self.entries,
+                },
+                f,
+                separators=(',', ':')
+            )
+
+    @staticmethod
+    def load(path):
+        with open(path, 'r', encoding='UTF-8') as f:
+            data = json.load(f)
+
+        if data.get('format') != OPAFIndex.FORMAT_VERSION:
+            raise Exception("Unsupported index format in '" + path + "'")
+
+        return OPAFIndex(
+            data['size'],
+            data['root'],
+            data['entries'],
+            data.get('mtime'),
+            data.get('digest')
+        )
+
+    def save_for(self, path):
+        # Record the file the index was built for so changes can be detected
+        size, self.mtime, self.digest = OPAFIndex.get_fingerprint(path)
+
+        if size != self.size:
+            raise Exception("Index does not match '" + path + "'")
+
+        self.save(OPAFIndex.get_path(path))
+
+    @staticmethod
+    def load_for(path):
+        # Load sidecar index for the given file if it is up to date
+        index_path = OPAFIndex.get_path(path)
+
+        if not os.path.isfile(index_path):
+            return None
+
+        try:
+            index = OPAFIndex.load(index_path)
+        except Exception:
+            return None
+
+        # Rebuild unless the file is unchanged since the index was written
+        if (index.size, index.mtime, index.digest) != OPAFIndex.get_fingerprint(path):
+            return None
+
+        return index
@@ -27,13 +27,16 @@ class OPAFMetadata:
                  elements=[]):
         self.elements = elements
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None, elements=True):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__NAME__)
 
-        for e in self.elements:
-            element = parseString(e).documentElement
-            node.appendChild(element)
+        if elements:
+            for e in self.elements:
+                element = parseString(e).documentElement
+                node.appendChild(element)
 
         return node
 
@@ -0,0 +1,161 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+from xml.dom.minidom import parseString
+
+from opaf.lib import OPAFAction
+
+
+class OPAFMinifier:
+
+    # Definition types which can be removed when unreferenced
+    TYPES = [
+        'action',
+        'block',
+        'color',
+        'image',
+    ]
+
+    def __init__(self, doc):
+        self.opaf_doc = doc
+        self.references = {}
+        self.dynamic = set()
+        self.removed = {}
+
+    def __add_reference(self, type, name):
+        # Names set by expressions can not be resolved before compilation
+        if '${' in name:
+            self.dynamic.add(type)
+            return False
+
+        if name in self.references[type]:
+            return False
+
+        self.references[type].add(name)
+
+        return True
+
+    def __scan_element(self, element, pending):
+        node = parseString(element).documentElement
+
+        for n in [node] + node.getElementsByTagName('*'):
+            if n.hasAttribute('color'):
+                self.__add_reference('color', n.getAttribute('color'))
+
+            if n.tagName == 'opaf:action':
+                self.__add_reference('action', n.getAttribute('name'))
+
+            elif n.tagName == 'opaf:image':
+                self.__add_reference('image', n.getAttribute('name'))
+
+            elif n.tagName == 'opaf:block':
+                name = n.getAttribute('name')
+
+                if self.__add_reference('block', name):
+                    pending.append(name)
+
+    def __scan_metadata(self):
+        if not self.opaf_doc.opaf_metadata:
+            return
+
+        for e in self.opaf_doc.opaf_metadata.elements:
+            node = parseString(e).documentElement
+
+            for n in [node] + node.getElementsByTagName('image'):
+                if n.tagName == 'image' and n.hasAttribute('name'):
+                    self.__add_reference('image', n.getAttribute('name'))
+
+    def __is_reachable(self, type, name):
+        return type in self.dynamic or name in self.references[type]
+
+    def __filter(self, type, objects):
+        result = []
+        self.removed[type] = []
+
+        for o in objects:
+            if self.__is_reachable(type, o.name):
+                result.append(o)
+            else:
+                self.removed[type].append(o.name)
+
+        return result
+
+    def minify(self):
+        doc = self.opaf_doc
+        blocks = {}
+
+        for b in doc.opaf_blocks:
+            blocks[b.name] = b
+
+        self.references = {t: set() for t in self.TYPES}
+        self.dynamic = set()
+
+        # Components and charts are always compiled so are used as roots
+        elements = []
+
+        for c in doc.opaf_components:
+            elements += c.elements
+
+        for c in doc.opaf_charts:
+            elements += c.rows
+
+        pending = []
+
+        for e in elements:
+            self.__scan_element(e, pending)
+
+        # Follow block references
+        scanned = set()
+
+        while True:
+            if 'block' in self.dynamic:
+                pending += [b for b in blocks if b not in scanned]
+
+            if not pending:
+                break
+
+            name = pending.pop()
+
+            if name in scanned or name not in blocks:
+                continue
+
+            scanned.add(name)
+
+            for e in blocks[name].elements:
+                self.__scan_element(e, pending)
+
+        # Default color parameters of referenced actions and blocks
+        for o in doc.opaf_actions + doc.opaf_blocks:
+            if isinstance(o, OPAFAction):
+                type = 'action'
+            else:
+                type = 'block'
+
+            if not self.__is_reachable(type, o.name):
+                continue
+
+            color = o.params.get('color')
+
+            if isinstance(color, str) and color != '':
+                self.__add_reference('color', color)
+
+        self.__scan_metadata()
+
+        # Remove unreachable definitions
+        doc.opaf_actions = self.__filter('action', doc.opaf_actions)
+        doc.opaf_blocks = self.__filter('block', doc.opaf_blocks)
+        doc.opaf_colors = self.__filter('color', doc.opaf_colors)
+        doc.opaf_images = self.__filter('image', doc.opaf_images)
+
+        return doc
@@ -0,0 +1,141 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import mmap
+import os
+import zipfile
+
+from xml.dom.minidom import parseString
+from xml.sax.saxutils import quoteattr
+
+from opaf.lib import (
+    OPAFAction,
+    OPAFBlock,
+    OPAFChart,
+    OPAFColor,
+    OPAFComponent,
+    OPAFConfig,
+    OPAFImage,
+    OPAFIndex,
+    OPAFMetadata,
+    OPAFPackager
+)
+
+
+class OPAFPackageReader:
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.file = None
+        self.data = None
+        self.archive = None
+
+        if zipfile.is_zipfile(self.path):
+            # Images are stored as separate entries in archives
+            self.archive = zipfile.ZipFile(self.path)
+            self.data = self.archive.read(OPAFPackager.ARCHIVE_PATTERN)
+            self.index = OPAFIndex.build(self.data)
+        else:
+            self.file = open(self.path, 'rb')
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index = OPAFIndex.load_for(self.path)
+
+            # Fall back to scanning the package
+            if self.index is None:
+                self.index = OPAFIndex.build(self.data)
+
+        if 'pkg_version' not in self.index.root:
+            self.close()
+            raise Exception("'" + path + "' is not an OPAF package file")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+
+        if self.file:
+            self.data.close()
+            self.file.close()
+            self.file = None
+
+    def get_root(self):
+        return dict(self.index.root)
+
+    def get_names(self, tag):
+        return self.index.get_names(tag)
+
+    def read(self, tag, name=None):
+        entry = self.index.find(tag, name)
+        offset = entry[2]
+
+        return bytes(self.data[offset:offset + entry[3]])
+
+    def __get_node(self, tag, name=None):
+        # Wrap fragment so the namespace prefix is declared
+        namespace = self.index.root.get('xmlns:opaf', '')
+        doc = parseString(
+            b'<pattern xmlns:opaf='
+            + quoteattr(namespace).encode('utf-8')
+            + b'>'
+            + self.read(tag, name)
+            + b'</pattern>'
+        )
+
+        node = doc.documentElement.firstChild
+
+        # Resolve deduplicated definitions
+        if node.hasAttribute('alias'):
+            alias = self.__get_node(tag, node.getAttribute('alias'))
+            alias.setAttribute('name', node.getAttribute('name'))
+
+            return alias
+
+        return node
+
+    def get_metadata(self):
+        if not self.index.get_names(OPAFMetadata.__NAME__):
+            return None
+
+        return OPAFMetadata.parse(self.__get_node(OPAFMetadata.__NAME__))
+
+    def get_action(self, name):
+        return OPAFAction.parse(self.__get_node(OPAFAction.__DEFINE_NAME__, name))
+
+    def get_block(self, name):
+        return OPAFBlock.parse(self.__get_node(OPAFBlock.__DEFINE_NAME__, name))
+
+    def get_chart(self, name):
+        return OPAFChart.parse(self.__get_node(OPAFChart.__DEFINE_NAME__, name))
+
+    def get_color(self, name):
+        return OPAFColor.parse(self.__get_node(OPAFColor.__DEFINE_NAME__, name))
+
+    def get_config(self, name):
+        return OPAFConfig.parse(self.__get_node(OPAFConfig.__DEFINE_NAME__, name))
+
+    def get_component(self, name):
+        return OPAFComponent.parse(self.__get_node(OPAFComponent.__NAME__, name))
+
+    def get_image(self, name):
+        return OPAFImage.parse(
+            self.__get_node(OPAFImage.__DEFINE_NAME__, name),
+            os.path.dirname(self.path),
+            archive=self.archive
+        )
@@ -12,74 +12,318 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-from importlib.metadata import version
 from packaging.version import Version
 
+import base64
+import hashlib
+import io
 import xml.dom.minidom
 import uuid
 
-from opaf.lib import SPEC_VERSION
+from xml.dom.minidom import parseString
+
+from opaf.lib import SPEC_VERSION, EXTENDED_SPEC_VERSION, OPAFImage, Utils
 
 class OPAFPackager:
 
-    def __init__(self, doc=None):
+    ARCHIVE_PATTERN = "pattern.xml"
+    ARCHIVE_IMAGES = "images/"
+
+    # Encode image data in chunks which are a multiple of 3 bytes
+    __DATA_CHUNK_SIZE__ = 3 * 16384
+
+    def __init__(self, doc=None, dedupe=False, image_budget=None):
         self.opaf_doc = doc
         self.pkg_doc = xml.dom.minidom.Document()
+        self.dedupe = dedupe
+        self.image_budget = image_budget
+        self.images_fitted = False
+        self.image_aliases = {}
+        self.block_aliases = {}
+
+    def prepare(self):
+        if not self.opaf_doc.unique_id:
+            self.opaf_doc.set_unique_id(str(uuid.uuid4()))
+
+        if not self.opaf_doc.version:
+            self.opaf_doc.version = Version("1.0")
+
+        if self.image_budget is not None and not self.images_fitted:
+            self.__fit_images()
+            self.images_fitted = True
+
+        # Find definitions with identical content
+        if self.dedupe:
+            self.image_aliases = self.__get_aliases(
+                self.opaf_doc.opaf_images,
+                lambda i: i.data
+            )
+            self.block_aliases = self.__get_aliases(
+                self.opaf_doc.opaf_blocks,
+                lambda b: (
+                    Utils.params_to_str(b.params) + '\0' + '\0'.join(b.elements)
+                ).encode('utf-8')
+            )
+
+    def __fit_images(self):
+        # Images with identical data are only counted once
+        images = {}
+
+        for i in self.opaf_doc.opaf_images:
+            images.setdefault(i.data, []).append(i)
+
+        total = sum(len(d) for d in images)
+
+        if total <= self.image_budget:
+            return
+
+        # Share budget between images in proportion to their size
+        for data, objects in images.items():
+            budget = self.image_budget * len(data) // total
+            format = objects[0].get_format()
+
+            if format not in OPAFImage.OUTPUT_FORMATS:
+                format = None
+
+            new_data = OPAFImage.transcode(data, format, max_bytes=budget)
+
+            for i in objects:
+                i.data = new_data
+
+    @staticmethod
+    def __get_aliases(objects, get_content):
+        aliases = {}
+        names = {}
+
+        for o in objects:
+            key = hashlib.sha256(get_content(o)).digest()
+
+            if key in names:
+                aliases[o.name] = names[key]
+            else:
+                names[key] = o.name
+
+        return aliases
+
+    def __get_element_xml(self, element, namespace=None):
+        # Reuse stored element text when it serializes identically
+        if (
+            '\n' not in element
+            and '\r' not in element
+            and '\t' not in element
+            and '<![CDATA[' not in element
+        ):
+            if namespace is None:
+                return element
+
+            end = element.index('>')
+
+            if element[end - 1] == '/':
+                end -= 1
+
+            if element[:end].endswith(namespace):
+                return element[:end - len(namespace)] + element[end:]
+
+        node = parseString(element).documentElement
+
+        if namespace is not None and node.hasAttribute('xmlns:opaf'):
+            node.removeAttribute('xmlns:opaf')
+
+        return node.toxml()
+
+    def __write_node(self, stream, node, elements=None, namespace=None):
+        # Start tag is serialized by minidom to match its attribute escaping
+        start_tag = node.toxml()
+
+        if not elements:
+            stream.write(start_tag)
+            return
+
+        stream.write(start_tag[:-2] + '>')
+
+        for e in elements:
+            stream.write(self.__get_element_xml(e, namespace))
+
+        stream.write('</' + node.tagName + '>')
+
+    def __write_alias(self, stream, node, alias):
+        alias_node = self.pkg_doc.createElement(node.tagName)
+        alias_node.setAttribute("name", node.getAttribute("name"))
+        alias_node.setAttribute("alias", alias)
+
+        stream.write(alias_node.toxml())
+
+    def __write_image(self, stream, image, archive):
+        if image.name in self.image_aliases:
+            self.__write_alias(
+                stream,
+                image.to_node(doc=self.pkg_doc, data=False),
+                self.image_aliases[image.name]
+            )
+            return
+
+        if archive:
+            node = image.to_node(entry=self.get_archive_entry(image), doc=self.pkg_doc)
+            stream.write(node.toxml())
+            return
+
+        start_tag = image.to_node(doc=self.pkg_doc, data=False).toxml()
+        stream.write(start_tag[:-2] + ' data="')
+
+        for i in range(0, len(image.data), self.__DATA_CHUNK_SIZE__):
+            stream.write(
+                base64.b64encode(
+                    image.data[i:i + self.__DATA_CHUNK_SIZE__]
+                ).decode('ascii')
+            )
+
+        stream.write('"/>')
+
+    def write(self, stream, archive=False):
+        self.prepare()
 
-    def package(self):
         # Set root element
         root_element = self.pkg_doc.createElement("pattern")
         root_element.setAttribute("xmlns:opaf", self.opaf_doc.opaf_namespace)
-        root_element.setAttribute("spec_version", SPEC_VERSION)
-        root_element.setAttribute("pkg_version", "python_" + version('opaf'))
+        root_element.setAttribute("spec_version", self.get_spec_version(archive))
+        root_element.setAttribute("pkg_version", "python_" + Utils.get_version())
         root_element.setAttribute("name", self.opaf_doc.name)
+        root_element.setAttribute("unique_id", self.opaf_doc.unique_id)
+        root_element.setAttribute("version", self.opaf_doc.version.__str__())
 
-        if not self.opaf_doc.unique_id:
-            self.opaf_doc.set_unique_id(str(uuid.uuid4()))
+        doc = self.opaf_doc
 
-        root_element.setAttribute("unique_id", self.opaf_doc.unique_id)
+        # Namespace declaration as stored on definition elements
+        ns_element = self.pkg_doc.createElement('e')
+        ns_element.setAttribute("xmlns:opaf", doc.opaf_namespace)
+        namespace = ns_element.toxml()[2:-2]
 
-        if not self.opaf_doc.version:
-            self.opaf_doc.version = Version("1.0")
+        stream.write('<?xml version="1.0" ?>')
 
-        root_element.setAttribute("version", self.opaf_doc.version.__str__())
+        # Empty packages are written as a single element
+        if not (
+            doc.opaf_metadata
+            or doc.opaf_colors
+            or doc.opaf_actions
+            or doc.opaf_configs
+            or doc.opaf_values
+            or doc.opaf_charts
+            or doc.opaf_blocks
+            or doc.opaf_components
+            or doc.opaf_images
+        ):
+            stream.write(root_element.toxml())
+            return
 
-        self.pkg_doc.appendChild(root_element)
+        stream.write(root_element.toxml()[:-2] + '>')
 
         # Metadata
-        if self.opaf_doc.opaf_metadata:
-            root_element.appendChild(self.opaf_doc.opaf_metadata.to_node())
+        if doc.opaf_metadata:
+            self.__write_node(
+                stream,
+                doc.opaf_metadata.to_node(self.pkg_doc, elements=False),
+                doc.opaf_metadata.elements
+            )
 
         # Colors
-        for color in self.opaf_doc.opaf_colors:
-            root_element.appendChild(color.to_node())
+        for color in doc.opaf_colors:
+            self.__write_node(stream, color.to_node(self.pkg_doc))
 
         # Actions
-        for action in self.opaf_doc.opaf_actions:
-            root_element.appendChild(action.to_node())
+        for action in doc.opaf_actions:
+            self.__write_node(
+                stream,
+                action.to_node(self.pkg_doc, elements=False),
+                action.elements
+            )
 
         # Configs
-        for config in self.opaf_doc.opaf_configs:
-            root_element.appendChild(config.to_node())
+        for config in doc.opaf_configs:
+            self.__write_node(stream, config.to_node(self.pkg_doc))
 
         # Values
-        for value in self.opaf_doc.opaf_values:
-            root_element.appendChild(value.to_node())
+        for value in doc.opaf_values:
+            self.__write_node(stream, value.to_node(self.pkg_doc))
 
         # Charts
-        for chart in self.opaf_doc.opaf_charts:
-            root_element.appendChild(chart.to_node())
+        for chart in doc.opaf_charts:
+            self.__write_node(
+                stream,
+                chart.to_node(self.pkg_doc, elements=False),
+                chart.rows,
+                namespace
+            )
 
         # Blocks
-        for block in self.opaf_doc.opaf_blocks:
-            root_element.appendChild(block.to_node())
+        for block in doc.opaf_blocks:
+            if block.name in self.block_aliases:
+                self.__write_alias(
+                    stream,
+                    block.to_node(self.pkg_doc, elements=False),
+                    self.block_aliases[block.name]
+                )
+                continue
+
+            self.__write_node(
+                stream,
+                block.to_node(self.pkg_doc, elements=False),
+                block.elements,
+                namespace
+            )
 
         # Components
-        for component in self.opaf_doc.opaf_components:
-            root_element.appendChild(component.to_node())
+        for component in doc.opaf_components:
+            self.__write_node(
+                stream,
+                component.to_node(self.pkg_doc, elements=False),
+                component.elements,
+                namespace
+            )
 
         # Images
-        for image in self.opaf_doc.opaf_images:
-            root_element.appendChild(image.to_node())
+        for image in doc.opaf_images:
+            self.__write_image(stream, image, archive)
+
+        stream.write('</pattern>')
+
+    def get_spec_version(self, archive=False):
+        # Older readers can not resolve aliases or archive entries
+        if (
+            self.image_aliases
+            or self.block_aliases
+            or (archive and self.opaf_doc.opaf_images)
+        ):
+            return EXTENDED_SPEC_VERSION
+
+        return SPEC_VERSION
+
+    @staticmethod
+    def get_archive_entry(image):
+        return OPAFPackager.ARCHIVE_IMAGES + image.name + image.get_extension()
+
+    def package(self):
+        stream = io.StringIO()
+        self.write(stream)
+
+        return stream.getvalue()
+
+    def package_archive(self, file):
+        import zipfile
+
+        with zipfile.ZipFile(file, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(self.ARCHIVE_PATTERN, 'w') as entry:
+                stream = io.TextIOWrapper(entry, encoding='UTF-8')
+                self.write(stream, archive=True)
+                stream.flush()
+                stream.detach()
+
+            # Images are already compressed so are stored as is
+            for image in self.opaf_doc.opaf_images:
+                if image.name in self.image_aliases:
+                    continue
 
-        return self.pkg_doc.toxml()
+                archive.writestr(
+                    self.get_archive_entry(image),
+                    image.data,
+                    compress_type=zipfile.ZIP_STORED
+                )
@@ -29,15 +29,32 @@ from opaf.lib import (
     OPAFDocument,
     OPAFImage,
     OPAFMetadata,
+    OPAFPackager,
+    OPAFSnapshot,
     OPAFValue,
     Utils
 )
 
 
 class OPAFParser:
+
+    __METADATA_BUFSIZE__ = 4096
+
     def __init__(self,
-                 src_path):
+                 src_path,
+                 workers=None,
+                 image_cache=None,
+                 build_cache=None,
+                 image_options=None):
         self.src_path = os.path.abspath(src_path)
+        self.workers = workers
+        self.image_cache = image_cache
+        self.image_options = image_options
+        self.build_cache = build_cache
+        self.archive = None
+        self.pending_images = []
+        self.dependencies = []
+        self.parsed_paths = []
 
         # Get OPAF namespace
         self.namespace = Utils.get_url("namespace")
@@ -57,103 +74,145 @@ class OPAFParser:
         if not doc.documentElement.hasAttribute("xmlns:opaf"):
             raise Exception("OPAF namespace is not declared in pattern attributes")
 
-    def __parse_root(self, doc):
+    def __parse_root(self, root, opaf_doc):
         # Set name
-        if doc.documentElement.hasAttribute("name"):
-            self.opaf_doc.set_name(doc.documentElement.getAttribute("name"))
+        if root.hasAttribute("name"):
+            opaf_doc.set_name(root.getAttribute("name"))
 
         # Check for pattern version
-        if doc.documentElement.hasAttribute("version"):
-            self.opaf_doc.version = Version(doc.documentElement.getAttribute("version"))
+        if root.hasAttribute("version"):
+            opaf_doc.version = Version(root.getAttribute("version"))
 
         # Check for spec version
-        if doc.documentElement.hasAttribute("spec_version"):
-            self.opaf_doc.spec_version = Version(doc.documentElement.getAttribute("spec_version"))
+        if root.hasAttribute("spec_version"):
+            opaf_doc.spec_version = Version(
+                root.getAttribute("spec_version")
+            )
 
         # Check if this is a packaged file
-        if doc.documentElement.hasAttribute("pkg_version"):
-            self.opaf_doc.pkg_version = doc.documentElement.getAttribute("pkg_version")
+        if root.hasAttribute("pkg_version"):
+            opaf_doc.pkg_version = root.getAttribute("pkg_version")
 
         # Check for unique ID
-        if doc.documentElement.hasAttribute("unique_id"):
-            self.opaf_doc.set_unique_id(doc.documentElement.getAttribute("unique_id"))
+        if root.hasAttribute("unique_id"):
+            opaf_doc.set_unique_id(root.getAttribute("unique_id"))
 
-    def __parse_opaf_configs(self, doc):
+    def __parse_opaf_configs(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_config")
 
         for element in elements:
             config = OPAFConfig.parse(element)
-            self.opaf_doc.add_opaf_config(config)
+            opaf_doc.add_opaf_config(config)
 
-    def __parse_opaf_values(self, doc):
+    def __parse_opaf_values(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_value")
 
         for element in elements:
             value = OPAFValue.parse(element)
-            self.opaf_doc.add_opaf_value(value)
+            opaf_doc.add_opaf_value(value)
 
-    def __parse_opaf_colors(self, doc):
+    def __parse_opaf_colors(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_color")
 
         for element in elements:
             value = OPAFColor.parse(element)
-            self.opaf_doc.add_opaf_color(value)
+            opaf_doc.add_opaf_color(value)
 
-    def __parse_opaf_images(self, doc, dir):
+    def __parse_opaf_images(self, doc, dir, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_image")
 
+        # Defer image processing so it can be done concurrently
         for element in elements:
-            image = OPAFImage.parse(element, dir)
-            self.opaf_doc.add_opaf_image(image)
-
-    def __parse_opaf_metadata(self, doc):
+            self.pending_images.append((element, dir, opaf_doc))
+
+    def __parse_opaf_image(self, element, dir):
+        # Aliases are resolved once all images are loaded
+        if element.hasAttribute("alias"):
+            return None
+
+        return OPAFImage.parse(
+            element,
+            dir,
+            self.image_cache,
+            self.archive,
+            self.image_options
+        )
+
+    def __load_opaf_images(self, executor):
+        images = executor.map(
+            lambda i: self.__parse_opaf_image(i[0], i[1]),
+            self.pending_images
+        )
+
+        # Add images in definition order
+        for (element, dir, opaf_doc), image in zip(self.pending_images, images):
+            if image is None:
+                opaf_doc.add_opaf_image_alias(
+                    element.getAttribute("name"),
+                    element.getAttribute("alias")
+                )
+            else:
+                opaf_doc.add_opaf_image(image)
+
+        self.pending_images = []
+
+    def __parse_opaf_metadata(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:metadata")
 
         for element in elements:
             metadata = OPAFMetadata.parse(element)
-            self.opaf_doc.add_opaf_metadata(metadata)
+            opaf_doc.add_opaf_metadata(metadata)
 
-    def __parse_opaf_actions(self, doc):
+    def __parse_opaf_actions(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_action")
 
         for element in elements:
             action = OPAFAction.parse(element)
-            self.opaf_doc.add_opaf_action(action)
+            opaf_doc.add_opaf_action(action)
 
-    def __parse_opaf_charts(self, doc):
+    def __parse_opaf_charts(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_chart")
 
         for element in elements:
             chart = OPAFChart.parse(element)
-            self.opaf_doc.add_opaf_chart(chart)
+            opaf_doc.add_opaf_chart(chart)
 
-    def __parse_opaf_blocks(self, doc):
+    def __parse_opaf_blocks(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:define_block")
 
         for element in elements:
+            if element.hasAttribute("alias"):
+                opaf_doc.add_opaf_block_alias(
+                    element.getAttribute("name"),
+                    element.getAttribute("alias")
+                )
+                continue
+
             block = OPAFBlock.parse(element)
-            self.opaf_doc.add_opaf_block(block)
+            opaf_doc.add_opaf_block(block)
 
-    def __parse_opaf_components(self, doc):
+    def __parse_opaf_components(self, doc, opaf_doc):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:component")
 
         for element in elements:
             component = OPAFComponent.parse(element)
-            self.opaf_doc.add_opaf_component(component)
+            opaf_doc.add_opaf_component(component)
 
-    def __parse_opaf_includes(self, doc, dir):
+    def __get_opaf_includes(self, doc, dir):
         root = doc.documentElement
         elements = root.getElementsByTagName("opaf:include")
 
+        file_paths = []
+
         for element in elements:
             uri = element.getAttribute("uri")
             file_path = Utils.parse_uri(uri, dir)
@@ -161,41 +220,329 @@ class OPAFParser:
             if not file_path:
                 raise Exception("Included OPAF file not found with uri： %s" % uri)
 
-            # Recursively parse included OPAF files
-            inc_doc = xml.dom.minidom.parse(file_path)
-            self.__parse_opaf_includes(inc_doc, os.path.dirname(file_path))
-            self.__parse_opaf_colors(inc_doc)
-            self.__parse_opaf_configs(inc_doc)
-            self.__parse_opaf_values(inc_doc)
-            self.__parse_opaf_images(inc_doc, os.path.dirname(file_path))
-            self.__parse_opaf_metadata(inc_doc)
-            self.__parse_opaf_actions(inc_doc)
-            self.__parse_opaf_charts(inc_doc)
-            self.__parse_opaf_blocks(inc_doc)
+            file_paths.append(file_path)
+
+        return file_paths
+
+    def __get_opaf_images(self, doc, dir):
+        root = doc.documentElement
+        elements = root.getElementsByTagName("opaf:define_image")
+
+        img_paths = []
+
+        for element in elements:
+            if element.hasAttribute("uri"):
+                img_path = Utils.parse_uri(element.getAttribute("uri"), dir)
+
+                if img_path:
+                    img_paths.append(img_path)
+
+        return img_paths
+
+    @staticmethod
+    def scan_dependencies(src_path):
+        # Best effort so files can be watched while they do not parse
+        file_paths = []
+        img_paths = []
+        pending = [os.path.abspath(src_path)]
+
+        while pending:
+            file_path = pending.pop(0)
+
+            if file_path in file_paths:
+                continue
+
+            file_paths.append(file_path)
+
+            try:
+                doc = xml.dom.minidom.parse(file_path)
+            except Exception:
+                continue
+
+            dir = os.path.dirname(file_path)
+
+            for element in doc.documentElement.getElementsByTagName("opaf:include"):
+                inc_path = Utils.parse_uri(element.getAttribute("uri"), dir)
+
+                if inc_path:
+                    pending.append(inc_path)
+
+            for element in doc.documentElement.getElementsByTagName("opaf:define_image"):
+                if element.hasAttribute("uri"):
+                    img_path = Utils.parse_uri(element.getAttribute("uri"), dir)
+
+                    if img_path:
+                        img_paths.append(img_path)
+
+        return file_paths + img_paths
+
+    def __load_opaf_files(self, file_paths, executor):
+        # Use stored results for unchanged files
+        cached = {}
+
+        if self.build_cache:
+            for file_path in file_paths:
+                cached[file_path] = self.build_cache.get(file_path)
+
+        parse_paths = [f for f in file_paths if not cached.get(f)]
+
+        # Load included files concurrently
+        inc_docs = dict(
+            zip(parse_paths, executor.map(xml.dom.minidom.parse, parse_paths))
+        )
+
+        # Order included files so nested includes are parsed first
+        sources = []
+
+        for file_path in file_paths:
+            if cached.get(file_path):
+                fragment, includes = cached[file_path]
+                sources += self.__load_opaf_files(includes, executor)
+                sources.append([file_path, None, fragment, includes])
+            else:
+                inc_doc = inc_docs[file_path]
+                includes = self.__get_opaf_includes(inc_doc, os.path.dirname(file_path))
+                sources += self.__load_opaf_files(includes, executor)
+                sources.append([file_path, inc_doc, None, includes])
+
+        return sources
+
+    def __parse_opaf_fragment(self, doc, dir, fragment=None):
+        if fragment is None:
+            fragment = OPAFDocument()
+            fragment.set_opaf_namespace(self.namespace)
+
+        self.__parse_opaf_colors(doc, fragment)
+        self.__parse_opaf_configs(doc, fragment)
+        self.__parse_opaf_values(doc, fragment)
+        self.__parse_opaf_images(doc, dir, fragment)
+        self.__parse_opaf_metadata(doc, fragment)
+        self.__parse_opaf_actions(doc, fragment)
+        self.__parse_opaf_charts(doc, fragment)
+        self.__parse_opaf_blocks(doc, fragment)
+
+        return fragment
+
+    def __merge_opaf_fragment(self, fragment):
+        for c in fragment.opaf_colors:
+            self.opaf_doc.add_opaf_color(c)
+
+        for c in fragment.opaf_configs:
+            self.opaf_doc.add_opaf_config(c)
+
+        for v in fragment.opaf_values:
+            self.opaf_doc.add_opaf_value(v)
+
+        for i in fragment.opaf_images:
+            self.opaf_doc.add_opaf_image(i)
+
+        # Copy metadata so stored fragments are not modified when merging
+        if fragment.opaf_metadata:
+            self.opaf_doc.add_opaf_metadata(
+                OPAFMetadata(list(fragment.opaf_metadata.elements))
+            )
+
+        for a in fragment.opaf_actions:
+            self.opaf_doc.add_opaf_action(a)
+
+        for c in fragment.opaf_charts:
+            self.opaf_doc.add_opaf_chart(c)
+
+        for b in fragment.opaf_blocks:
+            self.opaf_doc.add_opaf_block(b)
+
+        for c in fragment.opaf_components:
+            self.opaf_doc.add_opaf_component(c)
+
+    def parse_metadata(self):
+        # Snapshots are loaded without parsing so are already fast
+        if OPAFSnapshot.is_snapshot(self.src_path):
+            return OPAFSnapshot.load(self.src_path)
+
+        import zipfile
+
+        if zipfile.is_zipfile(self.src_path):
+            with zipfile.ZipFile(self.src_path) as archive:
+                with archive.open(OPAFPackager.ARCHIVE_PATTERN) as stream:
+                    return self.__parse_metadata(stream)
+
+        with open(self.src_path, 'rb') as stream:
+            return self.__parse_metadata(stream)
+
+    def __parse_metadata(self, stream):
+        from xml.dom import pulldom
+
+        opaf_doc = OPAFDocument()
+        opaf_doc.set_opaf_namespace(self.namespace)
+
+        # Small reads so little beyond the metadata is parsed
+        events = pulldom.parse(stream, bufsize=OPAFParser.__METADATA_BUFSIZE__)
+        depth = 0
+
+        for event, node in events:
+            if event == pulldom.END_ELEMENT:
+                depth -= 1
+                continue
+
+            if event != pulldom.START_ELEMENT:
+                continue
+
+            depth += 1
+
+            if depth == 1:
+                if node.tagName != "pattern":
+                    raise Exception("'pattern' root node not found in OPAF file")
+
+                if not node.hasAttribute("xmlns:opaf"):
+                    raise Exception(
+                        "OPAF namespace is not declared in pattern attributes"
+                    )
+
+                self.__parse_root(node, opaf_doc)
+            elif depth == 2:
+                if node.tagName == OPAFMetadata.__NAME__:
+                    events.expandNode(node)
+                    depth -= 1
+
+                    opaf_doc.add_opaf_metadata(OPAFMetadata.parse(node))
+
+                # Packages always start with metadata
+                if opaf_doc.pkg_version:
+                    break
+
+        # Stop reading the rest of the file
+        events.clear()
+
+        return opaf_doc
+
+    @staticmethod
+    def scan_metadata(dir, workers=None, extensions=('.opafpkg',)):
+        paths = []
+
+        for root, dirs, files in os.walk(dir):
+            for f in sorted(files):
+                if os.path.splitext(f)[1] in extensions:
+                    paths.append(os.path.join(root, f))
+
+        # Only the start of each file is read so scanning is mostly I/O
+        def load(path):
+            try:
+                return path, OPAFParser(path).parse_metadata()
+            except Exception as e:
+                return path, e
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(load, paths))
 
     def parse(self):
-        # Parse input file
-        try:
-            doc = xml.dom.minidom.parse(self.src_path)
-        except Exception as e:
-            raise ExpatError("OPAF namespace is not declared" + ", " + str(e))
-
-        # Check source document is valid
-        self.__check_doc(doc)
-
-        # Parse root pattern element
-        self.__parse_root(doc)
-
-        # Parse main file
-        self.__parse_opaf_includes(doc, os.path.dirname(self.src_path))
-        self.__parse_opaf_colors(doc)
-        self.__parse_opaf_configs(doc)
-        self.__parse_opaf_values(doc)
-        self.__parse_opaf_images(doc, os.path.dirname(self.src_path))
-        self.__parse_opaf_metadata(doc)
-        self.__parse_opaf_actions(doc)
-        self.__parse_opaf_charts(doc)
-        self.__parse_opaf_blocks(doc)
-        self.__parse_opaf_components(doc)
+        # Load snapshot files directly
+        if OPAFSnapshot.is_snapshot(self.src_path):
+            self.opaf_doc = OPAFSnapshot.load(self.src_path)
+            return self.opaf_doc
+
+        # Open archive packages
+        import zipfile
+
+        if zipfile.is_zipfile(self.src_path):
+            with zipfile.ZipFile(self.src_path) as archive:
+                self.archive = archive
+
+                try:
+                    return self.__parse(archive.read(OPAFPackager.ARCHIVE_PATTERN))
+                finally:
+                    self.archive = None
+
+        return self.__parse()
+
+    def __parse(self, data=None):
+        src_dir = os.path.dirname(self.src_path)
+        cached = None
+
+        if data is None and self.build_cache:
+            cached = self.build_cache.get(self.src_path)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            if cached:
+                main, includes = cached
+                doc = None
+            else:
+                # Parse input file
+                try:
+                    if data is None:
+                        doc = xml.dom.minidom.parse(self.src_path)
+                    else:
+                        doc = xml.dom.minidom.parseString(data)
+                except Exception as e:
+                    raise ExpatError("OPAF namespace is not declared" + ", " + str(e))
+
+                # Check source document is valid
+                self.__check_doc(doc)
+
+                # Parse root pattern element
+                main = OPAFDocument()
+                main.set_opaf_namespace(self.namespace)
+                self.__parse_root(doc.documentElement, main)
+
+                includes = self.__get_opaf_includes(doc, src_dir)
+
+            # Load included files
+            sources = self.__load_opaf_files(includes, executor)
+
+            # Parse included files
+            for source in sources:
+                file_path, inc_doc, fragment, inc_includes = source
+
+                if fragment is None:
+                    source[2] = self.__parse_opaf_fragment(
+                        inc_doc,
+                        os.path.dirname(file_path)
+                    )
+
+            # Parse main file
+            if doc is not None:
+                self.__parse_opaf_fragment(doc, src_dir, main)
+                self.__parse_opaf_components(doc, main)
+
+            # Process images
+            self.__load_opaf_images(executor)
+
+        # Source files and images used to build the document
+        self.dependencies = []
+        self.parsed_paths = []
+
+        for file_path, inc_doc, fragment, inc_includes in (
+            sources + [[self.src_path, doc, main, includes]]
+        ):
+            if inc_doc is not None:
+                img_paths = self.__get_opaf_images(inc_doc, os.path.dirname(file_path))
+                self.parsed_paths.append(file_path)
+
+                # Store results for changed files
+                if self.build_cache and not (file_path == self.src_path and data):
+                    self.build_cache.put(file_path, fragment, inc_includes, img_paths)
+            else:
+                img_paths = self.build_cache.get_images(file_path)
+
+            self.dependencies += [file_path] + img_paths
+
+        if self.build_cache:
+            self.build_cache.save()
+
+        # Merge definitions in include order
+        for source in sources:
+            self.__merge_opaf_fragment(source[2])
+
+        self.__merge_opaf_fragment(main)
+
+        # Root pattern attributes
+        self.opaf_doc.set_name(main.name)
+        self.opaf_doc.set_version(main.version)
+        self.opaf_doc.set_spec_version(main.spec_version)
+        self.opaf_doc.set_pkg_version(main.pkg_version)
+        self.opaf_doc.set_unique_id(main.unique_id)
 
         return self.opaf_doc
@@ -0,0 +1,87 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import base64
+import mmap
+import os
+
+from xml.dom.minidom import parseString
+
+from opaf.lib import OPAFIndex
+
+
+class OPAFProjectReader:
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.file = open(self.path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = OPAFIndex.load_for(self.path)
+
+        # Fall back to scanning the project
+        if self.index is None:
+            self.index = OPAFIndex.build(self.data, nested=OPAFIndex.PROJECT_NESTED)
+
+        if 'pkg_version' in self.index.root or 'spec_version' not in self.index.root:
+            self.close()
+            raise Exception("'" + path + "' is not a compiled OPAF project file")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.file:
+            self.data.close()
+            self.file.close()
+            self.file = None
+
+    def get_root(self):
+        return dict(self.index.root)
+
+    def get_names(self, tag):
+        return self.index.get_names(tag)
+
+    def __read_entry(self, entry):
+        offset = entry[2]
+
+        return bytes(self.data[offset:offset + entry[3]])
+
+    def read(self, tag, name=None):
+        return self.__read_entry(self.index.find(tag, name))
+
+    def read_rows(self, tag, name, start=None, stop=None):
+        rows = self.index.get_children(tag, name, 'row')
+
+        return [self.__read_entry(r) for r in rows[start:stop]]
+
+    def __get_node(self, tag, name=None):
+        return parseString(self.read(tag, name)).documentElement
+
+    def get_component(self, name):
+        return self.__get_node('component', name)
+
+    def get_chart(self, name):
+        return self.__get_node('chart', name)
+
+    def get_rows(self, tag, name, start=None, stop=None):
+        return [
+            parseString(r).documentElement
+            for r in self.read_rows(tag, name, start, stop)
+        ]
+
+    def get_image(self, name):
+        return base64.b64decode(self.__get_node('image', name).getAttribute('data'))
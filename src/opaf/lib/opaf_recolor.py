@@ -0,0 +1,155 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import xml.parsers.expat
+
+from xml.sax.saxutils import escape
+
+from opaf.lib import OPAFColor
+
+
+class OPAFRecolor:
+
+    __CHUNK_SIZE__ = 1024 * 1024
+    __END_TAG__ = b'</color'
+
+    # Project elements which follow color definitions
+    __STOP_TAGS__ = [
+        'chart',
+        'component',
+    ]
+
+    def __init__(self, colors):
+        # Validate colors before reading the project
+        self.colors = {}
+
+        for name, value in colors.items():
+            self.colors[name] = OPAFColor.to_hex(value.lower())
+
+        self.recolored = []
+
+    def __find_colors(self, src):
+        parser = xml.parsers.expat.ParserCreate()
+        spans = []
+        depth = [0]
+        current = []
+        done = [False]
+
+        # Open color as [start, name, has content]
+        def start_element(name, attrs):
+            depth[0] += 1
+
+            if current:
+                current[-1][2] = True
+
+            if depth[0] != 2:
+                return
+
+            if name == 'color' and attrs.get('name') in self.colors:
+                current.append([parser.CurrentByteIndex, attrs['name'], False])
+            elif name in self.__STOP_TAGS__:
+                done[0] = True
+
+        def end_element(name):
+            if depth[0] == 2 and current:
+                start, color, has_content = current.pop()
+                spans.append((start, parser.CurrentByteIndex, color, has_content))
+
+            depth[0] -= 1
+
+        def content(*args):
+            if current:
+                current[-1][2] = True
+
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = content
+
+        # Colors are defined before charts and components so stop there
+        for chunk in iter(lambda: src.read(self.__CHUNK_SIZE__), b''):
+            parser.Parse(chunk, False)
+
+            if done[0]:
+                return spans
+
+        parser.Parse(b'', True)
+
+        return spans
+
+    def __get_element(self, name):
+        return (
+            '<color name="' + escape(name, {'"': '&quot;'})
+            + '" value="' + self.colors[name] + '"/>'
+        ).encode('utf-8')
+
+    @staticmethod
+    def __copy(src, dst, length):
+        while length > 0:
+            chunk = src.read(min(length, OPAFRecolor.__CHUNK_SIZE__))
+
+            if not chunk:
+                break
+
+            dst.write(chunk)
+            length -= len(chunk)
+
+    def recolor(self, src, dst):
+        spans = self.__find_colors(src)
+        self.recolored = []
+
+        # Copy project replacing only the color definitions
+        src.seek(0)
+        pos = 0
+
+        for start, end, name, has_content in spans:
+            self.__copy(src, dst, start - pos)
+            dst.write(self.__get_element(name))
+
+            # Empty element tags report the position after the tag
+            src.seek(end - 2)
+            empty = not has_content and src.read(2) == b'/>'
+            src.seek(end)
+
+            # Explicit end tags are reported at their start
+            if not empty:
+                if src.read(len(self.__END_TAG__)) != self.__END_TAG__:
+                    raise Exception("Unexpected end of color '" + name + "'")
+
+                while src.read(1) not in (b'>', b''):
+                    pass
+
+            pos = src.tell()
+            self.recolored.append(name)
+
+        for chunk in iter(lambda: src.read(self.__CHUNK_SIZE__), b''):
+            dst.write(chunk)
+
+        return self.recolored
+
+    def recolor_file(self, src_path, dst_path):
+        # Destination can be the source so write next to it first
+        tmp_path = dst_path + ".tmp"
+
+        try:
+            with open(src_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                self.recolor(src, dst)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        os.replace(tmp_path, dst_path)
+
+        return self.recolored
@@ -0,0 +1,290 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import base64
+import collections
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from opaf.lib import OPAFCompiler, OPAFPackager, OPAFParser
+
+
+class OPAFRequestHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+    def __send(self, status, content, content_type):
+        body = content.encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type + '; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            stats = self.server.opaf_server.get_stats()
+            self.__send(200, json.dumps(stats), 'application/json')
+        else:
+            self.__send(404, json.dumps({'error': 'Not found'}), 'application/json')
+
+    def do_POST(self):
+        opaf_server = self.server.opaf_server
+        method = self.path.strip('/')
+
+        if method not in OPAFServer.METHODS:
+            self.__send(404, json.dumps({'error': 'Not found'}), 'application/json')
+            return
+
+        start = time.perf_counter()
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            params = json.loads(self.rfile.read(length) or b'{}')
+
+            if not isinstance(params, dict):
+                raise Exception("Request body must be a JSON object")
+
+            result = opaf_server.submit(method, params)
+            status = 200
+        except Exception as e:
+            result = {'error': str(e)}
+            status = 400
+
+        opaf_server.add_latency(method, time.perf_counter() - start, status == 200)
+
+        if isinstance(result, str):
+            self.__send(status, result, 'application/xml')
+        else:
+            self.__send(status, json.dumps(result), 'application/json')
+
+
+class OPAFServer:
+
+    __DEFAULT_HOST__ = '127.0.0.1'
+    __DEFAULT_PORT__ = 8080
+    __DEFAULT_CACHE_SIZE__ = 32
+    __LATENCY_SAMPLES__ = 1000
+
+    METHODS = [
+        'compile',
+        'package',
+        'extract',
+    ]
+
+    def __init__(self,
+                 host=None,
+                 port=None,
+                 workers=None,
+                 cache_size=None,
+                 image_cache=None):
+        if host is None:
+            host = OPAFServer.__DEFAULT_HOST__
+
+        if port is None:
+            port = OPAFServer.__DEFAULT_PORT__
+
+        if cache_size is None:
+            cache_size = OPAFServer.__DEFAULT_CACHE_SIZE__
+
+        self.cache_size = cache_size
+        self.image_cache = image_cache
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+
+        # Parsed packages by content hash
+        self.docs = collections.OrderedDict()
+        self.hashes = collections.OrderedDict()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self.latencies = {}
+
+        self.httpd = ThreadingHTTPServer((host, port), OPAFRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.opaf_server = self
+
+    def get_address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            self.executor.shutdown()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+    def submit(self, method, params):
+        return self.executor.submit(getattr(self, method), params).result()
+
+    def __get_hash(self, path):
+        stat = os.stat(path)
+        state = (stat.st_mtime_ns, stat.st_size)
+
+        # Only hash files again when they have been modified
+        with self.lock:
+            entry = self.hashes.get(path)
+
+            if entry and entry[0] == state:
+                self.hashes.move_to_end(path)
+                return entry[1]
+
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        with self.lock:
+            self.hashes[path] = (state, digest.hexdigest())
+            self.hashes.move_to_end(path)
+
+            # Hashes are kept for as many files as documents
+            while len(self.hashes) > self.cache_size:
+                self.hashes.popitem(last=False)
+
+        return digest.hexdigest()
+
+    def get_document(self, path):
+        path = os.path.abspath(path)
+        key = self.__get_hash(path)
+
+        with self.lock:
+            opaf_doc = self.docs.get(key)
+
+            if opaf_doc is not None:
+                self.docs.move_to_end(key)
+                self.cache_stats['hits'] += 1
+                return opaf_doc
+
+            self.cache_stats['misses'] += 1
+
+        opaf_doc = OPAFParser(path, image_cache=self.image_cache).parse()
+
+        with self.lock:
+            self.docs[key] = opaf_doc
+
+            while len(self.docs) > self.cache_size:
+                self.docs.popitem(last=False)
+                self.cache_stats['evictions'] += 1
+
+        return opaf_doc
+
+    @staticmethod
+    def __get_param(params, name):
+        if not params.get(name):
+            raise Exception("Missing parameter '" + name + "'")
+
+        return params[name]
+
+    def __get_package(self, params):
+        opaf_doc = self.get_document(OPAFServer.__get_param(params, 'package'))
+
+        if not opaf_doc.pkg_version:
+            raise Exception("'" + params['package'] + "' is not an OPAF package file")
+
+        return opaf_doc
+
+    def compile(self, params):
+        opaf_doc = self.__get_package(params)
+
+        # Compilation does not modify the cached document
+        opaf_compiler = OPAFCompiler(
+            opaf_doc,
+            configs={str(k): str(v) for k, v in params.get('configs', {}).items()},
+            colors={str(k): str(v) for k, v in params.get('colors', {}).items()}
+        )
+
+        return opaf_compiler.compile(OPAFServer.__get_param(params, 'name'))
+
+    def package(self, params):
+        # Source files are parsed for every request as packaging modifies them
+        opaf_parser = OPAFParser(
+            os.path.abspath(OPAFServer.__get_param(params, 'input')),
+            image_cache=self.image_cache
+        )
+        opaf_doc = opaf_parser.parse()
+
+        if opaf_doc.pkg_version:
+            raise Exception("Input file is already packaged")
+
+        return OPAFPackager(opaf_doc).package()
+
+    def extract(self, params):
+        opaf_doc = self.__get_package(params)
+        images = []
+
+        for i in opaf_doc.opaf_images:
+            images.append({
+                'name': i.name,
+                'format': i.get_format(),
+                'data': base64.b64encode(i.data).decode('ascii'),
+            })
+
+        return {'images': images}
+
+    def add_latency(self, method, latency, success):
+        with self.lock:
+            if method not in self.latencies:
+                self.latencies[method] = {
+                    'requests': 0,
+                    'errors': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'samples': collections.deque(maxlen=OPAFServer.__LATENCY_SAMPLES__),
+                }
+
+            entry = self.latencies[method]
+            entry['requests'] += 1
+            entry['total'] += latency
+            entry['max'] = max(entry['max'], latency)
+            entry['samples'].append(latency)
+
+            if not success:
+                entry['errors'] += 1
+
+    def get_stats(self):
+        with self.lock:
+            latency = {}
+
+            for method, entry in self.latencies.items():
+                samples = sorted(entry['samples'])
+
+                latency[method] = {
+                    'requests': entry['requests'],
+                    'errors': entry['errors'],
+                    'mean': round(entry['total'] / entry['requests'] * 1000, 3),
+                    'p50': round(samples[int(len(samples) * 0.5)] * 1000, 3),
+                    'p95': round(samples[int(len(samples) * 0.95)] * 1000, 3),
+                    'max': round(entry['max'] * 1000, 3),
+                }
+
+            return {
+                'cache': dict(
+                    self.cache_stats,
+                    size=len(self.docs),
+                    capacity=self.cache_size
+                ),
+                'latency': latency,
+            }
@@ -0,0 +1,231 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import marshal
+import struct
+
+from packaging.version import Version
+
+from opaf.lib import (
+    SPEC_VERSION,
+    OPAFAction,
+    OPAFBlock,
+    OPAFChart,
+    OPAFColor,
+    OPAFConfig,
+    OPAFComponent,
+    OPAFDocument,
+    OPAFImage,
+    OPAFMetadata,
+    OPAFValue,
+    Utils
+)
+
+
+class OPAFSnapshot:
+
+    MAGIC = b"OPAFSNAP"
+    FORMAT_VERSION = 1
+
+    # Magic, format version, marshal version, library and spec version lengths
+    __HEADER__ = struct.Struct("<8sHHHH")
+
+    @staticmethod
+    def is_snapshot(path):
+        with open(path, "rb") as f:
+            return f.read(len(OPAFSnapshot.MAGIC)) == OPAFSnapshot.MAGIC
+
+    @staticmethod
+    def dumps(doc):
+        version = None
+        spec_version = None
+
+        if doc.version is not None:
+            version = str(doc.version)
+
+        if doc.spec_version is not None:
+            spec_version = str(doc.spec_version)
+
+        metadata = None
+
+        if doc.opaf_metadata:
+            metadata = list(doc.opaf_metadata.elements)
+
+        payload = (
+            (
+                doc.unique_id,
+                doc.name,
+                version,
+                doc.opaf_namespace,
+                spec_version,
+                doc.pkg_version
+            ),
+            [
+                (
+                    c.name,
+                    c.value,
+                    c.required,
+                    list(c.allowed_values) if c.allowed_values else None,
+                    c.title,
+                    c.description
+                )
+                for c in doc.opaf_configs
+            ],
+            [(v.name, v.value, v.uid, v.condition) for v in doc.opaf_values],
+            [(c.name, c.value, c.description) for c in doc.opaf_colors],
+            [(i.name, i.data) for i in doc.opaf_images],
+            [(c.name, list(c.rows), c.condition) for c in doc.opaf_charts],
+            [(b.name, list(b.elements), dict(b.params)) for b in doc.opaf_blocks],
+            [
+                (a.name, a.custom, dict(a.params), list(a.elements))
+                for a in doc.opaf_actions
+            ],
+            [
+                (c.name, c.uid, list(c.elements), c.condition)
+                for c in doc.opaf_components
+            ],
+            metadata
+        )
+
+        lib_version = Utils.get_version().encode("utf-8")
+        spec = SPEC_VERSION.encode("utf-8")
+
+        header = OPAFSnapshot.__HEADER__.pack(
+            OPAFSnapshot.MAGIC,
+            OPAFSnapshot.FORMAT_VERSION,
+            marshal.version,
+            len(lib_version),
+            len(spec)
+        )
+
+        return header + lib_version + spec + marshal.dumps(payload)
+
+    @staticmethod
+    def loads(data):
+        header_size = OPAFSnapshot.__HEADER__.size
+
+        if len(data) < header_size:
+            raise Exception("Snapshot data is truncated")
+
+        magic, format_version, marshal_version, lib_len, spec_len = (
+            OPAFSnapshot.__HEADER__.unpack_from(data)
+        )
+
+        # Validate snapshot
+        if magic != OPAFSnapshot.MAGIC:
+            raise Exception("Data is not an OPAF snapshot")
+
+        if format_version != OPAFSnapshot.FORMAT_VERSION:
+            raise Exception(
+                "Unsupported snapshot format version " + str(format_version)
+            )
+
+        if marshal_version != marshal.version:
+            raise Exception("Snapshot was created by an incompatible Python version")
+
+        offset = header_size
+        lib_version = bytes(data[offset:offset + lib_len]).decode("utf-8")
+        offset += lib_len
+        spec = bytes(data[offset:offset + spec_len]).decode("utf-8")
+        offset += spec_len
+
+        if lib_version != Utils.get_version():
+            raise Exception(
+                "Snapshot was created with library version "
+                + lib_version
+                + " but "
+                + Utils.get_version()
+                + " is installed"
+            )
+
+        if spec != SPEC_VERSION:
+            raise Exception(
+                "Snapshot was created for spec version "
+                + spec
+                + " but "
+                + SPEC_VERSION
+                + " is supported"
+            )
+
+        (
+            root,
+            configs,
+            values,
+            colors,
+            images,
+            charts,
+            blocks,
+            actions,
+            components,
+            metadata
+        ) = marshal.loads(data[offset:])
+
+        # Rebuild document
+        doc = OPAFDocument()
+
+        unique_id, name, version, namespace, spec_version, pkg_version = root
+
+        doc.set_unique_id(unique_id)
+        doc.set_name(name)
+        doc.set_opaf_namespace(namespace)
+        doc.set_pkg_version(pkg_version)
+
+        if version is not None:
+            doc.set_version(Version(version))
+
+        if spec_version is not None:
+            doc.set_spec_version(Version(spec_version))
+
+        for c in configs:
+            doc.add_opaf_config(OPAFConfig(*c))
+
+        for v in values:
+            name, value, uid, condition = v
+            doc.add_opaf_value(OPAFValue(name, value, uid, condition))
+
+        for c in colors:
+            doc.add_opaf_color(OPAFColor(*c))
+
+        for i in images:
+            doc.add_opaf_image(OPAFImage(*i))
+
+        for c in charts:
+            doc.add_opaf_chart(OPAFChart(*c))
+
+        for b in blocks:
+            doc.add_opaf_block(OPAFBlock(*b))
+
+        for a in actions:
+            doc.add_opaf_action(OPAFAction(*a))
+
+        for c in components:
+            name, uid, elements, condition = c
+            doc.add_opaf_component(
+                OPAFComponent(name, uid=uid, elements=elements, condition=condition)
+            )
+
+        if metadata is not None:
+            doc.add_opaf_metadata(OPAFMetadata(metadata))
+
+        return doc
+
+    @staticmethod
+    def save(doc, path):
+        with open(path, "wb") as f:
+            f.write(OPAFSnapshot.dumps(doc))
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return OPAFSnapshot.loads(f.read())
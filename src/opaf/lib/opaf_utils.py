@@ -12,12 +12,11 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import functools
 import os
 import re
 import xml.dom.minidom
 
-from importlib.metadata import metadata
-
 from opaf.lib import OPAFFuncs
 from opaf.lib.opaf_funcs import if_else
 
@@ -98,7 +97,11 @@ def check_node(node, allowed_nodes=[]):
     return node
 
 
+@functools.lru_cache(maxsize=None)
 def get_url(name):
+    # Deferred as importing distribution metadata is slow
+    from importlib.metadata import metadata
+
     urls = []
     urls = metadata('opaf').get_all("Project-URL")
 
@@ -112,8 +115,16 @@ def get_url(name):
     raise Exception("No URL found in distribution metadata with name '" + name + "'")
 
 
+@functools.lru_cache(maxsize=None)
+def get_version():
+    from importlib.metadata import version
+
+    return version('opaf')
+
+
 def write_to_file(data, filepath):
-    with open(filepath, 'w', encoding='UTF-8') as f:
+    # Newlines are not translated so offsets into the data stay valid
+    with open(filepath, 'w', encoding='UTF-8', newline='') as f:
         f.write(data)
 
 
@@ -284,17 +295,28 @@ def add_chart_attribute(nodes, name, row):
             add_chart_attribute(n.childNodes, name, row)
 
 
-def get_stitch_count(nodes):
+def get_stitch_count(nodes, counts=None):
     count = 0
 
     for n in nodes:
+        # Use counts recorded for nodes which have already been counted
+        if counts is not None and id(n) in counts:
+            count += counts[id(n)][1]
+            continue
+
+        if n.nodeType != n.ELEMENT_NODE:
+            continue
+
         if n.tagName == 'action':
             if n.hasAttribute('total'):
-                count += int(n.getAttribute('total'))
+                count += int(float(n.getAttribute('total')))
 
-        if n.tagName == 'repeat':
+        elif n.tagName == 'repeat':
             if n.hasAttribute('count'):
-                r_count = int(n.getAttribute('count'))
-                count += (r_count * get_stitch_count(n.childNodes))
+                r_count = int(float(n.getAttribute('count')))
+                count += (r_count * get_stitch_count(n.childNodes, counts))
+
+        else:
+            count += get_stitch_count(n.childNodes, counts)
 
     return count
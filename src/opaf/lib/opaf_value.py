@@ -30,8 +30,10 @@ class OPAFValue:
         self.value = value
         self.condition = condition
 
-    def to_node(self):
-        doc = xml.dom.minidom.Document()
+    def to_node(self, doc=None):
+        if doc is None:
+            doc = xml.dom.minidom.Document()
+
         node = doc.createElement(self.__DEFINE_NAME__)
         node.setAttribute("unique_id", self.uid)
         node.setAttribute("name", self.name)
@@ -0,0 +1,93 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import time
+
+
+class OPAFWatcher:
+
+    __DEFAULT_INTERVAL__ = 0.25
+    __DEFAULT_DEBOUNCE__ = 0.3
+
+    def __init__(self,
+                 paths=None,
+                 interval=None,
+                 debounce=None):
+        if interval is None:
+            interval = OPAFWatcher.__DEFAULT_INTERVAL__
+
+        if debounce is None:
+            debounce = OPAFWatcher.__DEFAULT_DEBOUNCE__
+
+        self.interval = interval
+        self.debounce = debounce
+        self.states = {}
+
+        if paths:
+            self.set_paths(paths)
+
+    @staticmethod
+    def __get_state(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get_states(self, paths):
+        return {os.path.abspath(p): self.__get_state(p) for p in paths}
+
+    def set_paths(self, paths, states=None):
+        # States taken before a build so files changed during it are seen
+        if states is None:
+            states = {}
+
+        self.states = {}
+
+        for p in paths:
+            p = os.path.abspath(p)
+            self.states[p] = states[p] if p in states else self.__get_state(p)
+
+    def poll(self):
+        changed = []
+
+        for p in self.states:
+            state = self.__get_state(p)
+
+            if state != self.states[p]:
+                self.states[p] = state
+                changed.append(p)
+
+        return changed
+
+    def wait(self):
+        changed = []
+
+        while not changed:
+            time.sleep(self.interval)
+            changed = self.poll()
+
+        # Wait until a burst of saves has finished
+        while True:
+            time.sleep(self.debounce)
+            more = self.poll()
+
+            if not more:
+                break
+
+            changed += [p for p in more if p not in changed]
+
+        return changed
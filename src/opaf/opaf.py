@@ -13,11 +13,315 @@
 #   limitations under the License.
 
 import argparse
-import base64
+import hashlib
+import json
 import logging
 import os
+import sys
+import time
 
-from opaf.lib import OPAFCompiler, OPAFPackager, OPAFParser, Utils
+from opaf.lib import (
+    OPAFBuildCache,
+    OPAFCompiler,
+    OPAFImage,
+    OPAFImageCache,
+    OPAFIndex,
+    OPAFMinifier,
+    OPAFPackager,
+    OPAFParser,
+    OPAFSnapshot,
+    Utils
+)
+from opaf.lib.metadata import MetadataUtils
+
+
+def watch(input_path,
+          output_path=None,
+          name=None,
+          configs={},
+          colors={},
+          debounce=None,
+          workers=None,
+          image_cache=None,
+          image_options=None,
+          image_budget=None):
+    from opaf.lib import OPAFWatcher
+
+    build_cache = OPAFBuildCache(
+        OPAFBuildCache.get_path(input_path),
+        settings=image_options
+    )
+    watcher = OPAFWatcher(debounce=debounce)
+    dependencies = []
+    pkg_hash = None
+    unique_id = None
+
+    while True:
+        timings = []
+
+        # Snapshot files before building so changes made during the build are seen
+        states = watcher.get_states(
+            dependencies or OPAFParser.scan_dependencies(input_path)
+        )
+
+        try:
+            # Parse source files reusing results for unchanged files
+            start = time.perf_counter()
+            opaf_parser = OPAFParser(
+                input_path,
+                workers=workers,
+                image_cache=image_cache,
+                build_cache=build_cache,
+                image_options=image_options
+            )
+            opaf_doc = opaf_parser.parse()
+            timings.append(('parse', time.perf_counter() - start))
+
+            dependencies = opaf_parser.dependencies
+            watcher.set_paths(dependencies, states)
+
+            if opaf_doc.pkg_version:
+                logging.error("Input file is already packaged")
+                return -2
+
+            # Document is unchanged when every file was loaded from the build cache
+            if pkg_hash is not None and not opaf_parser.parsed_paths:
+                logging.info("Sources are unchanged")
+            else:
+                # Keep generated unique ID stable between builds
+                if not opaf_doc.unique_id:
+                    opaf_doc.set_unique_id(unique_id)
+
+                # Package
+                start = time.perf_counter()
+                opaf_packager = OPAFPackager(opaf_doc, image_budget=image_budget)
+                opaf_pkg = opaf_packager.package()
+                unique_id = opaf_doc.unique_id
+
+                new_hash = hashlib.sha256(opaf_pkg.encode('utf-8')).digest()
+                changed = new_hash != pkg_hash
+                pkg_hash = new_hash
+
+                if changed:
+                    pkg_name = (
+                        os.path.splitext(input_path)[0]
+                        + "_" + opaf_doc.version.__str__()
+                        + ".opafpkg"
+                    )
+                    Utils.write_to_file(opaf_pkg, pkg_name)
+                else:
+                    logging.info("Package is unchanged")
+
+                timings.append(('package', time.perf_counter() - start))
+
+                # Compile the packaged document without parsing it again
+                if name and changed:
+                    start = time.perf_counter()
+                    opaf_doc.set_pkg_version("python_" + Utils.get_version())
+
+                    opaf_compiler = OPAFCompiler(opaf_doc, configs=configs, colors=colors)
+                    compiled_pattern = opaf_compiler.compile(name)
+
+                    if output_path:
+                        if not os.path.exists(output_path):
+                            os.makedirs(output_path)
+
+                        Utils.write_to_file(
+                            compiled_pattern,
+                            output_path
+                            + '/'
+                            + name.strip().replace(' ', '_').lower()
+                            + '.opafproj'
+                        )
+                    else:
+                        print(compiled_pattern)
+
+                    timings.append(('compile', time.perf_counter() - start))
+        except Exception as e:
+            logging.error(e)
+
+            # Build again once the error is fixed
+            pkg_hash = None
+
+            # Keep watching the last files used and any the source now refers to
+            paths = list(dependencies)
+
+            for p in OPAFParser.scan_dependencies(input_path):
+                if p not in paths:
+                    paths.append(p)
+
+            watcher.set_paths(paths, states)
+
+        if timings:
+            logging.info(
+                ", ".join("%s: %.1f ms" % (t[0], t[1] * 1000) for t in timings)
+            )
+
+        logging.info("Watching for changes...")
+
+        try:
+            changed_paths = watcher.wait()
+        except KeyboardInterrupt:
+            return 0
+
+        for p in changed_paths:
+            logging.info("Changed '" + p + "'")
+
+
+def run_batch(manifest_path, output_path=None, summary_path=None, workers=None):
+    from opaf.lib import OPAFBatch
+
+    try:
+        opaf_batch = OPAFBatch(
+            OPAFBatch.load_manifest(manifest_path),
+            workers=workers,
+            output_path=output_path
+        )
+        summary = opaf_batch.run()
+    except Exception as e:
+        logging.error(e)
+        return -2
+
+    for r in summary['results']:
+        if r['status'] == 'ok':
+            logging.debug("Compiled '" + r['name'] + "' to '" + r['output'] + "'")
+        else:
+            logging.error(
+                "Failed to compile '" + r['name'] + "' from '" + r['package'] + "': "
+                + r['error']
+            )
+
+    logging.info(
+        "Compiled %d of %d jobs from %d packages in %.1f ms" % (
+            summary['succeeded'],
+            summary['jobs'],
+            summary['packages'],
+            summary['time']
+        )
+    )
+
+    if summary_path:
+        with open(summary_path, 'w', encoding='UTF-8') as f:
+            json.dump(summary, f, indent=2)
+
+    if summary['failed']:
+        return -2
+
+    return 0
+
+
+def run_catalog(catalog_path, scan=None, query=None, workers=None):
+    from opaf.lib import OPAFCatalog
+
+    try:
+        with OPAFCatalog(catalog_path) as opaf_catalog:
+            if scan:
+                stats = opaf_catalog.update(
+                    [d.strip() for d in scan.split(',')],
+                    workers=workers
+                )
+
+                for path, error in stats['errors'].items():
+                    logging.error("Failed to index '" + path + "': " + error)
+
+                logging.info(
+                    "Catalog updated: %d added, %d updated, %d unchanged, %d removed" % (
+                        stats['added'],
+                        stats['updated'],
+                        stats['unchanged'],
+                        stats['removed']
+                    )
+                )
+
+            if query is not None:
+                metadata = {}
+                configs = {}
+                colors = []
+                components = []
+                name = None
+
+                # Keys are metadata nodes unless they have a special meaning
+                for key, value in Utils.parse_arg_list(query).items():
+                    if key == 'name':
+                        name = value
+                    elif key == 'color':
+                        colors.append(value)
+                    elif key == 'component':
+                        components.append(value)
+                    elif key.startswith('config.'):
+                        configs[key[len('config.'):]] = value
+                    elif key in MetadataUtils.SUPPORTED_NODES:
+                        metadata[key] = value
+                    else:
+                        configs[key] = value
+
+                for p in opaf_catalog.find(metadata, configs, colors, components, name):
+                    print(p['path'] + '\t' + str(p['name']) + '\t' + str(p['version']))
+    except Exception as e:
+        logging.error(e)
+        return -2
+
+    return 0
+
+
+def run_recolor(input_path, output_path=None, colors=None):
+    from opaf.lib import OPAFRecolor
+
+    try:
+        opaf_recolor = OPAFRecolor(Utils.parse_arg_list(colors))
+
+        if output_path:
+            if not os.path.exists(output_path):
+                os.makedirs(output_path)
+
+            opaf_recolor.recolor_file(
+                input_path,
+                os.path.join(output_path, os.path.basename(input_path))
+            )
+        else:
+            with open(input_path, 'rb') as src:
+                opaf_recolor.recolor(src, sys.stdout.buffer)
+
+        for name in opaf_recolor.colors:
+            if name not in opaf_recolor.recolored:
+                logging.warning("Color '" + name + "' is not defined in project")
+    except Exception as e:
+        logging.error(e)
+        return -2
+
+    return 0
+
+
+def run_server(port, workers=None, cache_size=None, image_cache=None,
+               image_cache_size=None):
+    from opaf.lib import OPAFServer
+
+    try:
+        if image_cache:
+            image_cache = OPAFImageCache(
+                image_cache,
+                max_size=image_cache_size * 1024 * 1024
+            )
+
+        opaf_server = OPAFServer(
+            port=port,
+            workers=workers,
+            cache_size=cache_size,
+            image_cache=image_cache
+        )
+    except Exception as e:
+        logging.error(e)
+        return -2
+
+    host, port = opaf_server.get_address()[:2]
+    logging.info("Serving on http://" + host + ":" + str(port))
+
+    try:
+        opaf_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
 
 
 def main():
@@ -25,9 +329,54 @@ def main():
     parser = argparse.ArgumentParser(description='Open Pattern Format (OPAF) Build Tool')
     parser.add_argument(
         '--input',
-        required=True,
+        required=False,
         help='Source file path (.opaf)'
     )
+    parser.add_argument(
+        '--batch',
+        required=False,
+        help='Compile all jobs in manifest file (.json or .csv)'
+    )
+    parser.add_argument(
+        '--summary',
+        required=False,
+        help='Write batch summary to file'
+    )
+    parser.add_argument(
+        '--catalog',
+        required=False,
+        help='Catalog database file (.db)'
+    )
+    parser.add_argument(
+        '--scan',
+        required=False,
+        help='Comma separated directories of OPAF packages to add to the catalog'
+    )
+    parser.add_argument(
+        '--query',
+        required=False,
+        help='Find catalog packages matching metadata, config, color or component'
+    )
+    parser.add_argument(
+        '--serve',
+        default=False,
+        action='store_true',
+        help='Run local compile server'
+    )
+    parser.add_argument(
+        '--port',
+        required=False,
+        type=int,
+        default=8080,
+        help='Port used by the compile server on localhost (Default: 8080)'
+    )
+    parser.add_argument(
+        '--cache_size',
+        required=False,
+        type=int,
+        default=32,
+        help='Number of parsed packages kept by the compile server (Default: 32)'
+    )
     parser.add_argument(
         '--output',
         required=False,
@@ -39,17 +388,112 @@ def main():
         action='store_true',
         help='Create distributable OPAF file'
     )
+    parser.add_argument(
+        '--archive',
+        default=False,
+        action='store_true',
+        help='Create OPAF package as a zip archive with images stored as entries'
+    )
+    parser.add_argument(
+        '--watch',
+        default=False,
+        action='store_true',
+        help='Package and compile again whenever source files change'
+    )
+    parser.add_argument(
+        '--debounce',
+        required=False,
+        type=int,
+        default=300,
+        help='Time to wait for further changes in watch mode in ms (Default: 300)'
+    )
+    parser.add_argument(
+        '--incremental',
+        default=False,
+        action='store_true',
+        help='Reuse results from the previous build for unchanged source files'
+    )
+    parser.add_argument(
+        '--minify',
+        default=False,
+        action='store_true',
+        help='Remove unreferenced definitions when packaging'
+    )
+    parser.add_argument(
+        '--dedupe',
+        default=False,
+        action='store_true',
+        help='Store identical images and blocks once when packaging'
+    )
+    parser.add_argument(
+        '--index',
+        default=False,
+        action='store_true',
+        help='Write random access index next to OPAF package or compiled project'
+    )
     parser.add_argument(
         '--compile',
         required=False,
         help='Compile OPAF project with given name'
     )
+    parser.add_argument(
+        '--component',
+        required=False,
+        help='Only compile the component with the given name'
+    )
+    parser.add_argument(
+        '--rows',
+        required=False,
+        help='Only compile rows START:STOP of the component, counted from zero'
+    )
+    parser.add_argument(
+        '--count_stitches',
+        default=False,
+        action='store_true',
+        help='Add stitch counts to compiled rows and check them against expected_count'
+    )
+    parser.add_argument(
+        '--render_charts',
+        default=False,
+        action='store_true',
+        help='Render charts of compiled OPAF project as PNG images'
+    )
+    parser.add_argument(
+        '--tile_size',
+        required=False,
+        type=int,
+        help='Split rendered charts into tiles with the given number of stitches'
+    )
+    parser.add_argument(
+        '--recolor',
+        default=False,
+        action='store_true',
+        help='Replace colors of compiled OPAF project (.opafproj) given by --colors'
+    )
     parser.add_argument(
         '--extract_images',
         default=False,
         action='store_true',
         help='Extract images from OPAF package'
     )
+    parser.add_argument(
+        '--extract_format',
+        required=False,
+        choices=['png', 'jpeg', 'webp', 'avif'],
+        help='Transcode extracted images to the given format'
+    )
+    parser.add_argument(
+        '--extract_size',
+        required=False,
+        type=int,
+        help='Maximum width and height of transcoded images in pixels'
+    )
+    parser.add_argument(
+        '--snapshot',
+        default=False,
+        action='store_true',
+        help='Create snapshot of OPAF package for fast loading'
+    )
     parser.add_argument(
         '--config',
         required=False,
@@ -60,6 +504,48 @@ def main():
         required=False,
         help='Colors to use for compilation'
     )
+    parser.add_argument(
+        '--workers',
+        required=False,
+        type=int,
+        help='Number of workers used to load includes and images (Default: auto)'
+    )
+    parser.add_argument(
+        '--image_cache',
+        required=False,
+        help='Directory used to cache processed images between runs'
+    )
+    parser.add_argument(
+        '--image_cache_size',
+        required=False,
+        type=int,
+        default=512,
+        help='Maximum size of the image cache in MB (Default: 512)'
+    )
+    parser.add_argument(
+        '--image_format',
+        required=False,
+        choices=['png', 'jpeg', 'webp', 'avif'],
+        help='Format of packaged images (Default: PNG if transparent, otherwise JPEG)'
+    )
+    parser.add_argument(
+        '--image_quality',
+        required=False,
+        type=int,
+        help='Quality of packaged images (Default: 75)'
+    )
+    parser.add_argument(
+        '--image_max_size',
+        required=False,
+        type=int,
+        help='Maximum size of each packaged image in KB'
+    )
+    parser.add_argument(
+        '--package_max_image_size',
+        required=False,
+        type=int,
+        help='Maximum total size of packaged images in KB'
+    )
     parser.add_argument(
         '--log_level',
         required=False,
@@ -69,13 +555,47 @@ def main():
 
     args = vars(parser.parse_args())
 
+    if not any(args.get(a) for a in ['input', 'batch', 'serve', 'catalog']):
+        parser.error('one of the arguments --input --batch --serve --catalog is required')
+
     input_path = args.get('input')
+    batch = args.get('batch')
+    summary_path = args.get('summary')
+    serve = args.get('serve')
+    catalog = args.get('catalog')
+    scan = args.get('scan')
+    query = args.get('query')
+    port = args.get('port')
+    cache_size = args.get('cache_size')
     output_path = args.get('output')
     package = args.get('package')
+    incremental = args.get('incremental')
+    watch_mode = args.get('watch')
+    debounce = args.get('debounce')
+    archive = args.get('archive')
+    index = args.get('index')
+    minify = args.get('minify')
+    dedupe = args.get('dedupe')
     compile = args.get('compile')
+    recolor = args.get('recolor')
+    render_charts = args.get('render_charts')
+    count_stitches = args.get('count_stitches')
+    component = args.get('component')
+    rows = args.get('rows')
+    tile_size = args.get('tile_size')
     extract_images = args.get('extract_images')
+    extract_format = args.get('extract_format')
+    extract_size = args.get('extract_size')
+    snapshot = args.get('snapshot')
     config = args.get('config')
     colors = args.get('colors')
+    workers = args.get('workers')
+    image_cache = args.get('image_cache')
+    image_cache_size = args.get('image_cache_size')
+    image_format = args.get('image_format')
+    image_quality = args.get('image_quality')
+    image_max_size = args.get('image_max_size')
+    package_max_image_size = args.get('package_max_image_size')
     log_level = getattr(logging, args.get('log_level').upper(), None)
 
     # Logging
@@ -83,6 +603,15 @@ def main():
         log_level = logging.INFO
     logging.basicConfig(format='%(levelname)s: %(message)s', level=log_level)
 
+    if batch:
+        return run_batch(batch, output_path, summary_path, workers)
+
+    if catalog:
+        return run_catalog(catalog, scan, query, workers)
+
+    if serve:
+        return run_server(port, workers, cache_size, image_cache, image_cache_size)
+
     # Check file exists
     if not os.path.isfile(input_path):
         logging.error("File not found '" + input_path + "'")
@@ -93,15 +622,135 @@ def main():
         logging.error("Input file is not an OPAF file or has the wrong extension")
         return -2
 
+    if recolor:
+        return run_recolor(input_path, output_path, colors)
+
+    if component and not compile:
+        logging.error("Compiling a component requires a project to compile.")
+        return -2
+
+    # Row range is given as START:STOP where either bound can be left out
+    row_range = (None, None)
+
+    if rows is not None:
+        if not component:
+            logging.error("Row range requires a component to compile.")
+            return -2
+
+        try:
+            row_range = tuple(int(r) if r.strip() else None for r in rows.split(':'))
+        except ValueError:
+            row_range = ()
+
+        if len(row_range) != 2:
+            logging.error("Row range must be in the form START:STOP")
+            return -2
+
+        start, stop = row_range
+
+        if (start is not None and start < 0) or (stop is not None and stop < 0):
+            logging.error("Row range bounds can not be negative.")
+            return -2
+
+        if start is not None and stop is not None and start >= stop:
+            logging.error("Row range " + rows + " is empty.")
+            return -2
+
+    # Charts are rendered from the compiled project into the output directory
+    if render_charts:
+        if not compile:
+            logging.error("Rendering charts requires a project to compile.")
+            return -2
+
+        if not output_path:
+            logging.error("Output path is not specified.")
+            return -2
+
+    # Project index is written next to the compiled project
+    if index and compile and not output_path:
+        logging.error("Indexing a compiled project requires an output path.")
+        return -2
+
+    # Check Pillow can write the requested image formats
+    for f in [image_format, extract_format]:
+        if f and not OPAFImage.is_format_supported(f):
+            logging.error("Image format '" + f + "' is not supported by Pillow")
+            return -2
+
+    # Image settings
+    image_options = {}
+
+    if image_format:
+        image_options['format'] = image_format
+
+    if image_quality is not None:
+        image_options['quality'] = image_quality
+
+    if image_max_size is not None:
+        image_options['max_bytes'] = image_max_size * 1024
+
+    image_budget = None
+
+    if package_max_image_size is not None:
+        image_budget = package_max_image_size * 1024
+
     try:
+        # Image cache
+        if image_cache:
+            image_cache = OPAFImageCache(
+                image_cache,
+                max_size=image_cache_size * 1024 * 1024
+            )
+
+        if watch_mode:
+            return watch(
+                input_path,
+                output_path=output_path,
+                name=compile,
+                configs=Utils.parse_arg_list(config),
+                colors=Utils.parse_arg_list(colors),
+                debounce=debounce / 1000,
+                workers=workers,
+                image_cache=image_cache,
+                image_options=image_options,
+                image_budget=image_budget
+            )
+
+        # Build cache
+        build_cache = None
+
+        if incremental and package:
+            build_cache = OPAFBuildCache(
+                OPAFBuildCache.get_path(input_path),
+                settings=image_options
+            )
+
         # Parse OPAF file
-        opaf_parser = OPAFParser(input_path)
+        opaf_parser = OPAFParser(
+            input_path,
+            workers=workers,
+            image_cache=image_cache,
+            build_cache=build_cache,
+            image_options=image_options
+        )
         opaf_doc = opaf_parser.parse()
 
         if package:
             if opaf_doc.pkg_version is None:
-                opaf_packager = OPAFPackager(opaf_doc)
-                opaf_pkg = opaf_packager.package()
+                if minify:
+                    opaf_minifier = OPAFMinifier(opaf_doc)
+                    opaf_minifier.minify()
+
+                    for t in opaf_minifier.removed:
+                        for name in opaf_minifier.removed[t]:
+                            logging.info("Removed unreferenced " + t + " '" + name + "'")
+
+                opaf_packager = OPAFPackager(
+                    opaf_doc,
+                    dedupe=dedupe,
+                    image_budget=image_budget
+                )
+                opaf_packager.prepare()
 
                 # Write OPAF package file
                 pkg_name = (
@@ -109,11 +758,46 @@ def main():
                     + "_" + opaf_doc.version.__str__()
                     + ".opafpkg"
                 )
-                Utils.write_to_file(opaf_pkg, pkg_name)
+
+                if archive:
+                    opaf_packager.package_archive(pkg_name)
+                else:
+                    with open(pkg_name, 'w', encoding='UTF-8') as pkg_file:
+                        opaf_packager.write(pkg_file)
             else:
                 logging.error("Input file is already packaged")
                 return -2
 
+        if index and not compile:
+            if package:
+                pkg_path = pkg_name
+            elif opaf_doc.pkg_version:
+                pkg_path = input_path
+            else:
+                logging.error("Input file is not an OPAF package file.")
+                return -2
+
+            import zipfile
+
+            if zipfile.is_zipfile(pkg_path):
+                logging.error("OPAF archive packages do not require an index.")
+                return -2
+
+            with open(pkg_path, 'rb') as pkg_file:
+                OPAFIndex.build(pkg_file.read()).save_for(pkg_path)
+
+        if snapshot:
+            if opaf_doc.pkg_version:
+                OPAFSnapshot.save(
+                    opaf_doc,
+                    os.path.splitext(input_path)[0] + ".opafsnap"
+                )
+            else:
+                logging.error(
+                    "Input file is not an OPAF package file."
+                )
+                return -2
+
         if extract_images:
             if opaf_doc.pkg_version:
                 # Check output directory
@@ -127,9 +811,25 @@ def main():
                     return -2
 
                 # Extract images
-                for i in opaf_doc.opaf_images:
-                    with open(output_path + '/' + i.name + '.webp', "wb") as img_file:
-                        img_file.write(base64.b64decode(i.data))
+                import zipfile
+
+                from opaf.lib import OPAFImageExtractor
+
+                # Archive entries are copied directly unless images are transcoded
+                transcode = extract_format or extract_size
+
+                if not transcode and zipfile.is_zipfile(input_path):
+                    OPAFImageExtractor.extract_archive(input_path, output_path)
+                else:
+                    opaf_extractor = OPAFImageExtractor(
+                        opaf_doc.opaf_images,
+                        workers=workers
+                    )
+                    opaf_extractor.extract(
+                        output_path,
+                        format=extract_format,
+                        size=extract_size
+                    )
             else:
                 logging.error(
                     "Input file is not an OPAF package file."
@@ -147,24 +847,73 @@ def main():
                 opaf_compiler = OPAFCompiler(
                     opaf_doc,
                     configs=custom_config,
-                    colors=custom_colors
+                    colors=custom_colors,
+                    count_stitches=count_stitches,
+                    index=index
                 )
-                compiled_pattern = opaf_compiler.compile(compile)
+                if component:
+                    start, stop = row_range
+
+                    compiled_pattern = opaf_compiler.compile_component(
+                        compile,
+                        component,
+                        start,
+                        stop
+                    )
+                else:
+                    compiled_pattern = opaf_compiler.compile(compile)
+
+                # Report rows which do not have the expected stitch count
+                for r in opaf_compiler.stitch_report:
+                    if not r['valid']:
+                        logging.warning(
+                            "%s '%s' row %d has %d stitches, expected %d" % (
+                                r['type'].capitalize(),
+                                r['name'],
+                                r['row'],
+                                r['count'],
+                                r['expected']
+                            )
+                        )
 
                 # Write XML pattern file
                 if output_path:
                     if not os.path.exists(output_path):
                         os.makedirs(output_path)
 
-                    Utils.write_to_file(
-                        compiled_pattern,
+                    proj_path = (
                         output_path
                         + '/'
                         + compile.strip().replace(' ', '_').lower()
                         + '.opafproj'
                     )
+
+                    Utils.write_to_file(compiled_pattern, proj_path)
+
+                    if index:
+                        opaf_compiler.project_index.save_for(proj_path)
+                    elif os.path.exists(OPAFIndex.get_path(proj_path)):
+                        # Remove index left by a previous compile
+                        os.remove(OPAFIndex.get_path(proj_path))
                 else:
                     print(compiled_pattern)
+
+                if render_charts:
+                    from opaf.lib import OPAFChartRenderer
+
+                    opaf_renderer = OPAFChartRenderer(
+                        opaf_doc,
+                        colors=custom_colors,
+                        cache=image_cache
+                    )
+
+                    # Charts can be excluded by conditions
+                    for name in opaf_compiler.get_chart_names():
+                        opaf_renderer.save(
+                            opaf_compiler.get_chart_grid(name),
+                            output_path,
+                            tile_size=tile_size
+                        )
             else:
                 logging.error(
                     "Input file is not an OPAF package file. Compilation is not possible."
@@ -173,6 +922,7 @@ def main():
 
     except Exception as e:
         logging.error(e)
+        return -2
 
     return 0
 
@@ -0,0 +1,41 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import re
+
+from opaf.lib import OPAFPackager
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+PROJECT = 'Test Hat'
+
+
+def normalize(data):
+    # Generated IDs and the tool version differ between runs
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+
+    data = re.sub(r' unique_id="[^"]*"', '', data)
+
+    return re.sub(r' pkg_version="[^"]*"', '', data)
+
+
+def write_package(doc, path, **kwargs):
+    with open(path, 'w', encoding='UTF-8') as f:
+        OPAFPackager(doc, **kwargs).write(f)
+
+    return path
@@ -0,0 +1,42 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import shutil
+
+import pytest
+
+from opaf.lib import OPAFParser
+from tests import FIXTURES, write_package
+
+
+@pytest.fixture
+def pattern_dir(tmp_path):
+    path = str(tmp_path / 'pattern')
+    shutil.copytree(os.path.join(FIXTURES, 'pattern'), path)
+
+    return path
+
+
+@pytest.fixture
+def pattern_path(pattern_dir):
+    return os.path.join(pattern_dir, 'pattern.opaf')
+
+
+@pytest.fixture
+def package_path(pattern_path):
+    doc = OPAFParser(pattern_path).parse()
+
+    return write_package(doc, os.path.splitext(pattern_path)[0] + '_1.0.opafpkg')
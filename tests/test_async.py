@@ -0,0 +1,56 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import asyncio
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from opaf.lib import Async, OPAFCompiler, OPAFParser
+from tests import PROJECT, normalize
+
+
+@pytest.fixture
+def doc(package_path):
+    return OPAFParser(package_path).parse()
+
+
+def test_compile_async(doc):
+    events = []
+    expected = OPAFCompiler(doc).compile(PROJECT)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return await Async.compile_async(
+                doc,
+                PROJECT,
+                progress=events.append,
+                executor=executor
+            )
+
+    assert normalize(asyncio.run(run())) == normalize(expected)
+
+    # Pompom is excluded by its condition
+    assert [e['component'] for e in events] == ['Hat']
+
+
+def test_compile_async_rejects_process_pool(doc):
+    async def run():
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            return await Async.compile_async(doc, PROJECT, executor=executor)
+
+    with pytest.raises(Exception, match='thread pool'):
+        asyncio.run(run())
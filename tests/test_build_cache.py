@@ -0,0 +1,69 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import xml.dom.minidom
+
+from opaf.lib import OPAFBuildCache, OPAFPackager, OPAFParser
+from tests import normalize
+
+
+def build(path, cache):
+    # The parser saves the cache manifest after each build
+    doc = OPAFParser(path, build_cache=cache).parse()
+
+    return OPAFPackager(doc).package()
+
+
+def test_incremental_build(pattern_path, monkeypatch):
+    cache_path = OPAFBuildCache.get_path(pattern_path)
+    expected = OPAFPackager(OPAFParser(pattern_path).parse()).package()
+
+    assert normalize(build(pattern_path, OPAFBuildCache(cache_path))) == normalize(
+        expected
+    )
+
+    # Record which files are parsed from XML
+    parsed = []
+    parse = xml.dom.minidom.parse
+
+    def tracked_parse(file, *args, **kwargs):
+        parsed.append(os.path.basename(file))
+        return parse(file, *args, **kwargs)
+
+    monkeypatch.setattr(xml.dom.minidom, 'parse', tracked_parse)
+
+    # Unchanged files are loaded from the cache
+    assert normalize(build(pattern_path, OPAFBuildCache(cache_path))) == normalize(
+        expected
+    )
+    assert parsed == []
+
+    # Only the edited include is parsed again
+    lib_path = os.path.join(os.path.dirname(pattern_path), 'lib', 'actions.opaf')
+
+    with open(lib_path, encoding='UTF-8') as f:
+        data = f.read()
+
+    with open(lib_path, 'w', encoding='UTF-8') as f:
+        f.write(data.replace('name="unused"', 'name="unused_edited"'))
+
+    result = build(pattern_path, OPAFBuildCache(cache_path))
+
+    assert parsed == ['actions.opaf']
+    assert 'unused_edited' in result
+    assert normalize(result) == normalize(
+        OPAFPackager(OPAFParser(pattern_path).parse()).package()
+    )
@@ -0,0 +1,97 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import xml.dom.minidom
+
+import pytest
+
+from opaf.lib import OPAFCompiler, OPAFParser
+from tests import PROJECT
+
+
+@pytest.fixture
+def doc(package_path):
+    return OPAFParser(package_path).parse()
+
+
+def compile_component(doc, component, start=None, stop=None):
+    data = OPAFCompiler(doc, configs={'size': '2'}).compile_component(
+        PROJECT,
+        component,
+        start,
+        stop
+    )
+
+    return xml.dom.minidom.parseString(data).documentElement
+
+
+def get_rows(root):
+    component = root.getElementsByTagName('component')[0]
+
+    return [r.toxml() for r in component.getElementsByTagName('row')]
+
+
+def get_names(root, tag):
+    return [n.getAttribute('name') for n in root.childNodes if n.nodeName == tag]
+
+
+def test_compile_component(doc):
+    root = compile_component(doc, 'Hat')
+
+    assert get_names(root, 'component') == ['Hat']
+    assert len(get_rows(root)) == 4
+
+    # Charts referenced by rows are included
+    assert get_names(root, 'chart') == ['checks']
+    assert get_names(root, 'image') == ['photo', 'photo_copy']
+
+
+def test_compile_component_without_charts(doc):
+    root = compile_component(doc, 'Pompom')
+
+    assert get_names(root, 'chart') == []
+    assert get_names(root, 'image') == ['photo']
+
+
+@pytest.mark.parametrize('start, stop, expected', [
+    (1, 3, slice(1, 3)),
+    (2, None, slice(2, None)),
+    (None, 1, slice(None, 1)),
+    (0, 100, slice(None)),
+])
+def test_row_range(doc, start, stop, expected):
+    rows = get_rows(compile_component(doc, 'Hat'))
+
+    assert get_rows(compile_component(doc, 'Hat', start, stop)) == rows[expected]
+
+
+def test_row_range_past_end(doc):
+    root = compile_component(doc, 'Hat', 10, 20)
+
+    # Instructions without rows in range are left out
+    assert get_rows(root) == []
+    assert root.getElementsByTagName('instruction') == []
+    assert get_names(root, 'chart') == []
+
+
+@pytest.mark.parametrize('start, stop', [
+    (-3, None),
+    (None, -1),
+    (2, 2),
+    (3, 1),
+])
+def test_invalid_row_range(doc, start, stop):
+    with pytest.raises(Exception):
+        compile_component(doc, 'Hat', start, stop)
@@ -0,0 +1,44 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+from io import BytesIO
+
+import pytest
+
+from PIL import Image, ImageCms
+
+from opaf.lib import OPAFImage
+
+
+@pytest.mark.parametrize('format', ['png', 'jpeg', 'webp'])
+def test_encode_strips_metadata(format):
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    src_file = BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(
+        src_file,
+        'JPEG',
+        icc_profile=icc_profile,
+        exif=Image.Exif().tobytes(),
+        comment=b'source'
+    )
+
+    img = Image.open(BytesIO(src_file.getvalue()))
+    assert 'icc_profile' in img.info
+
+    data = OPAFImage.encode(img, format)
+    info = Image.open(BytesIO(data)).info
+
+    for key in ['icc_profile', 'exif', 'comment']:
+        assert key not in info
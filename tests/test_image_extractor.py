@@ -0,0 +1,71 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import zipfile
+
+import pytest
+
+from opaf.lib import OPAFImageExtractor, OPAFPackager, OPAFParser
+
+
+@pytest.fixture
+def archive_path(pattern_path, tmp_path):
+    doc = OPAFParser(pattern_path).parse()
+    path = str(tmp_path / 'pattern.opafpkg')
+    OPAFPackager(doc, dedupe=True).package_archive(path)
+
+    return path
+
+
+def test_extract_archive(archive_path, tmp_path):
+    output_path = str(tmp_path / 'images')
+    OPAFImageExtractor.extract_archive(archive_path, output_path)
+
+    assert sorted(os.listdir(output_path)) == [
+        'logo.png',
+        'photo.jpg',
+        'photo_copy.jpg',
+    ]
+
+    # Deduplicated images are copied from the shared entry
+    with zipfile.ZipFile(archive_path) as archive:
+        data = archive.read('images/photo.jpg')
+
+    for name in ['photo.jpg', 'photo_copy.jpg']:
+        with open(os.path.join(output_path, name), 'rb') as f:
+            assert f.read() == data
+
+
+@pytest.mark.parametrize('name', ['../outside', '/tmp/outside', 'sub/outside'])
+def test_extract_archive_rejects_paths(tmp_path, name):
+    path = str(tmp_path / 'crafted.opafpkg')
+
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(
+            OPAFPackager.ARCHIVE_PATTERN,
+            '<pattern xmlns:opaf="https://github.com/open-pattern-format/opaf">'
+            '<opaf:define_image name="' + name + '" entry="images/a.png"/>'
+            '</pattern>'
+        )
+        archive.writestr('images/a.png', b'data')
+
+    output_path = tmp_path / 'out' / 'images'
+
+    with pytest.raises(Exception, match='Invalid image file name'):
+        OPAFImageExtractor.extract_archive(path, str(output_path))
+
+    assert os.listdir(str(output_path)) == []
+    assert not os.path.exists(str(tmp_path / 'out' / 'outside.png'))
@@ -0,0 +1,78 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+
+from opaf.lib import OPAFIndex, OPAFPackageReader, OPAFParser
+
+
+def test_index_offsets(package_path):
+    with open(package_path, 'rb') as f:
+        data = f.read()
+
+    index = OPAFIndex.build(data)
+
+    assert index.root['name'] == 'Test Hat'
+    assert index.get_names('opaf:component') == ['Hat', 'Pompom']
+
+    # Each entry covers exactly one element
+    for tag, name, offset, length, parent in index.entries:
+        fragment = data[offset:offset + length]
+
+        assert fragment.startswith(b'<' + tag.encode('utf-8'))
+        assert fragment.endswith(b'/>') or fragment.endswith(
+            b'</' + tag.encode('utf-8') + b'>'
+        )
+
+
+def test_reader_matches_parser(package_path):
+    doc = OPAFParser(package_path).parse()
+    OPAFIndex.build(open(package_path, 'rb').read()).save_for(package_path)
+
+    with OPAFPackageReader(package_path) as reader:
+        assert reader.get_root()['unique_id'] == doc.unique_id
+        assert reader.get_metadata().elements == doc.opaf_metadata.elements
+
+        for c in doc.opaf_components:
+            assert reader.get_component(c.name).elements == c.elements
+
+        for i in doc.opaf_images:
+            assert reader.get_image(i.name).data == i.data
+
+        assert reader.get_color('main').value == '#ff0000'
+
+
+def test_stale_index_is_rebuilt(package_path):
+    OPAFIndex.build(open(package_path, 'rb').read()).save_for(package_path)
+
+    assert OPAFIndex.load_for(package_path) is not None
+
+    # Same size edit which moves the components
+    with open(package_path, 'rb') as f:
+        data = f.read()
+
+    data = data.replace(b'name="Test Hat"', b'name="TestHat"', 1)
+    data = data.replace(b'<opaf:component ', b' <opaf:component ', 1)
+
+    with open(package_path, 'wb') as f:
+        f.write(data)
+
+    assert OPAFIndex.load_for(package_path) is None
+
+    with OPAFPackageReader(package_path) as reader:
+        assert reader.get_root()['name'] == 'TestHat'
+        assert reader.get_component('Hat').name == 'Hat'
+
+    assert os.path.isfile(OPAFIndex.get_path(package_path))
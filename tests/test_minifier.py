@@ -0,0 +1,36 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+from opaf.lib import OPAFMinifier, OPAFParser
+
+
+def test_minify_removes_unreferenced(pattern_path):
+    doc = OPAFParser(pattern_path).parse()
+    minifier = OPAFMinifier(doc)
+    doc = minifier.minify()
+
+    assert minifier.removed == {
+        'action': ['unused_action'],
+        'block': ['rib_copy', 'orphan'],
+        'color': ['unused'],
+        'image': ['logo'],
+    }
+
+    assert [a.name for a in doc.opaf_actions] == ['knit', 'purl']
+    assert [b.name for b in doc.opaf_blocks] == ['rib']
+    assert [c.name for c in doc.opaf_colors] == ['main', 'contrast']
+
+    # Images referenced from metadata and components are kept
+    assert [i.name for i in doc.opaf_images] == ['photo', 'photo_copy']
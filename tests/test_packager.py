@@ -0,0 +1,117 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import io
+import os
+import re
+import zipfile
+
+from opaf.lib import (
+    SPEC_VERSION,
+    EXTENDED_SPEC_VERSION,
+    OPAFImage,
+    OPAFPackager,
+    OPAFParser,
+)
+from tests import FIXTURES, normalize
+
+
+def strip_image_data(data):
+    # Encoded image bytes depend on the Pillow version
+    return re.sub(r' data="[^"]*"', '', data)
+
+
+def test_package_matches_reference(pattern_path, package_path):
+    # Reference was written by the DOM based packager
+    with open(os.path.join(FIXTURES, 'reference_1.0.opafpkg'), encoding='UTF-8') as f:
+        reference = f.read()
+
+    with open(package_path, encoding='UTF-8') as f:
+        package = f.read()
+
+    assert strip_image_data(normalize(package)) == strip_image_data(normalize(reference))
+
+
+def test_package_matches_write(pattern_path):
+    doc = OPAFParser(pattern_path).parse()
+    packager = OPAFPackager(doc)
+
+    stream = io.StringIO()
+    packager.write(stream)
+
+    assert packager.package() == stream.getvalue()
+
+
+def test_package_round_trip(pattern_path, package_path):
+    doc = OPAFParser(pattern_path).parse()
+    pkg_doc = OPAFParser(package_path).parse()
+
+    assert pkg_doc.pkg_version
+    assert pkg_doc.unique_id == doc.unique_id
+    assert [c.name for c in pkg_doc.opaf_components] == ['Hat', 'Pompom']
+    assert [b.elements for b in pkg_doc.opaf_blocks] == [
+        b.elements for b in doc.opaf_blocks
+    ]
+    assert pkg_doc.opaf_metadata.elements == doc.opaf_metadata.elements
+
+    # Image data is written in chunks and must decode to the same bytes
+    assert {i.name: i.data for i in pkg_doc.opaf_images} == {
+        i.name: i.data for i in doc.opaf_images
+    }
+
+
+def test_archive_round_trip(pattern_path, tmp_path):
+    doc = OPAFParser(pattern_path).parse()
+    path = str(tmp_path / 'pattern.opafpkg')
+    OPAFPackager(doc).package_archive(path)
+
+    pkg_doc = OPAFParser(path).parse()
+
+    assert {i.name: i.data for i in pkg_doc.opaf_images} == {
+        i.name: i.data for i in doc.opaf_images
+    }
+
+
+def get_spec_version(data):
+    return re.search(r' spec_version="([^"]*)"', data).group(1)
+
+
+def test_plain_package_keeps_spec_version(pattern_path):
+    doc = OPAFParser(pattern_path).parse()
+
+    assert get_spec_version(OPAFPackager(doc).package()) == SPEC_VERSION
+
+
+def test_aliases_bump_spec_version(pattern_path):
+    doc = OPAFParser(pattern_path).parse()
+    image = doc.opaf_images[0]
+    doc.add_opaf_image(OPAFImage(image.name + '_copy', image.data))
+
+    data = OPAFPackager(doc, dedupe=True).package()
+
+    assert ' alias="' in data
+    assert get_spec_version(data) == EXTENDED_SPEC_VERSION
+
+
+def test_archive_bumps_spec_version(pattern_path, tmp_path):
+    doc = OPAFParser(pattern_path).parse()
+    path = str(tmp_path / 'pattern.opafpkg')
+    OPAFPackager(doc).package_archive(path)
+
+    with zipfile.ZipFile(path) as archive:
+        data = archive.read(OPAFPackager.ARCHIVE_PATTERN).decode('utf-8')
+
+    assert ' entry="' in data
+    assert get_spec_version(data) == EXTENDED_SPEC_VERSION
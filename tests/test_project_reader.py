@@ -0,0 +1,100 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import base64
+import os
+import sys
+import xml.dom.minidom
+
+import pytest
+
+from opaf import opaf
+from opaf.lib import OPAFCompiler, OPAFIndex, OPAFParser, OPAFProjectReader, Utils
+from tests import PROJECT
+
+
+@pytest.fixture
+def project(package_path):
+    doc = OPAFParser(package_path).parse()
+    compiler = OPAFCompiler(doc, configs={'size': '2'}, index=True)
+    data = compiler.compile(PROJECT)
+
+    # Written as the command line tool writes projects
+    path = os.path.join(os.path.dirname(package_path), 'test_hat.opafproj')
+    Utils.write_to_file(data, path)
+
+    compiler.project_index.save_for(path)
+
+    return path, xml.dom.minidom.parseString(data).documentElement
+
+
+def get_children(node, tag):
+    return [n for n in node.childNodes if n.nodeName == tag]
+
+
+def test_project_index(project):
+    path, root = project
+
+    assert OPAFIndex.load_for(path) is not None
+
+    with OPAFProjectReader(path) as reader:
+        assert reader.get_root()['name'] == PROJECT
+        assert reader.get_names('component') == ['Hat', 'Pompom']
+        assert reader.get_names('chart') == ['checks']
+
+        for c in get_children(root, 'component'):
+            name = c.getAttribute('name')
+
+            assert reader.get_component(name).toxml() == c.toxml()
+
+            # Rows are indexed below their component
+            rows = c.getElementsByTagName('row')
+
+            assert [r.toxml() for r in reader.get_rows('component', name)] == [
+                r.toxml() for r in rows
+            ]
+            assert [r.toxml() for r in reader.get_rows('component', name, 1, 3)] == [
+                r.toxml() for r in rows[1:3]
+            ]
+
+        for i in get_children(root, 'image'):
+            assert reader.get_image(i.getAttribute('name')) == base64.b64decode(
+                i.getAttribute('data')
+            )
+
+
+def test_project_reader_without_index(project):
+    path, root = project
+    os.remove(OPAFIndex.get_path(path))
+
+    with OPAFProjectReader(path) as reader:
+        chart = get_children(root, 'chart')[0]
+
+        assert reader.get_chart('checks').toxml() == chart.toxml()
+        assert len(reader.read_rows('chart', 'checks')) == 2
+
+
+def test_project_reader_rejects_packages(package_path):
+    with pytest.raises(Exception):
+        OPAFProjectReader(package_path)
+
+
+def test_index_requires_output(package_path, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', [
+        'opaf', '--input', package_path, '--compile', PROJECT, '--index'
+    ])
+
+    assert opaf.main() == -2
+    assert not os.path.exists(OPAFIndex.get_path(package_path))
@@ -0,0 +1,120 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import io
+import os
+import xml.dom.minidom
+
+import pytest
+
+from opaf.lib import OPAFCompiler, OPAFPackager, OPAFParser, OPAFRecolor
+from tests import PROJECT
+
+
+def get_colors(data):
+    root = xml.dom.minidom.parseString(data).documentElement
+
+    return {
+        n.getAttribute('name'): n.getAttribute('value')
+        for n in root.childNodes
+        if n.nodeName == 'color'
+    }
+
+
+def recolor(data, colors):
+    dst = io.BytesIO()
+    OPAFRecolor(colors).recolor(io.BytesIO(data), dst)
+
+    return dst.getvalue()
+
+
+@pytest.fixture
+def project(package_path):
+    doc = OPAFParser(package_path).parse()
+
+    return OPAFCompiler(doc).compile(PROJECT).encode('utf-8')
+
+
+def test_recolor(project):
+    result = recolor(project, {'main': '#123456'})
+
+    assert get_colors(result) == {
+        'main': '#123456',
+        'contrast': '#00ff00',
+        'unused': '#0000ff',
+    }
+
+    # Everything but the color definition is copied unchanged
+    assert result.replace(b'#123456', b'#ff0000') == project
+
+
+def test_recolor_colors_only(tmp_path):
+    path = str(tmp_path / 'colors.opaf')
+
+    with open(path, 'w', encoding='UTF-8') as f:
+        f.write(
+            '<pattern xmlns:opaf="https://github.com/open-pattern-format/opaf"'
+            ' name="Colors">'
+            '<opaf:define_color name="main" value="red" />'
+            '<opaf:define_color name="contrast" value="green" />'
+            '</pattern>'
+        )
+
+    doc = OPAFParser(path).parse()
+    pkg_path = str(tmp_path / 'colors.opafpkg')
+
+    with open(pkg_path, 'w', encoding='UTF-8') as f:
+        OPAFPackager(doc).write(f)
+
+    project = OPAFCompiler(OPAFParser(pkg_path).parse()).compile('Colors')
+
+    # Last color is followed directly by the project end tag
+    assert project.endswith('/></project>')
+
+    for name in ['main', 'contrast']:
+        result = recolor(project.encode('utf-8'), {name: '#123456'})
+
+        assert get_colors(result)[name] == '#123456'
+        assert result.endswith(b'</project>')
+
+
+def test_recolor_explicit_end_tag():
+    data = (
+        b'<project><color name="main" value="#ff0000"></color>'
+        b'<color name="contrast" value="#00ff00"/></project>'
+    )
+    result = recolor(data, {'main': '#000000'})
+
+    assert result == (
+        b'<project><color name="main" value="#000000"/>'
+        b'<color name="contrast" value="#00ff00"/></project>'
+    )
+
+
+def test_recolor_file_in_place(project, tmp_path):
+    dir = tmp_path / 'out'
+    dir.mkdir()
+    path = str(dir / 'test_hat.opafproj')
+
+    with open(path, 'wb') as f:
+        f.write(project)
+
+    OPAFRecolor({'contrast': 'white'}).recolor_file(path, path)
+
+    with open(path, 'rb') as f:
+        assert get_colors(f.read())['contrast'] == '#ffffff'
+
+    # Temporary file is replaced into place
+    assert os.listdir(str(dir)) == ['test_hat.opafproj']
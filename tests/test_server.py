@@ -0,0 +1,47 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import shutil
+
+import pytest
+
+from opaf.lib import OPAFServer
+
+
+@pytest.fixture
+def server():
+    opaf_server = OPAFServer(port=0, cache_size=2)
+    yield opaf_server
+    opaf_server.httpd.server_close()
+    opaf_server.executor.shutdown()
+
+
+def test_document_cache_is_bounded(server, package_path):
+    paths = []
+
+    for i in range(4):
+        path = package_path + '.' + str(i)
+        shutil.copyfile(package_path, path)
+        paths.append(os.path.abspath(path))
+
+    for path in paths:
+        assert server.get_document(path).name
+
+    assert len(server.docs) <= 2
+    assert list(server.hashes) == paths[-2:]
+
+    # Copies share one document so only the first request is a miss
+    assert server.get_stats()['cache']['misses'] == 1
@@ -0,0 +1,58 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+
+import pytest
+
+from opaf.lib import OPAFCompiler, OPAFParser, OPAFSnapshot
+from tests import PROJECT, normalize
+
+
+def test_snapshot_round_trip(package_path):
+    doc = OPAFParser(package_path).parse()
+    path = os.path.splitext(package_path)[0] + '.opafsnap'
+    OPAFSnapshot.save(doc, path)
+
+    assert OPAFSnapshot.is_snapshot(path)
+    assert not OPAFSnapshot.is_snapshot(package_path)
+
+    snap_doc = OPAFParser(path).parse()
+
+    assert snap_doc.unique_id == doc.unique_id
+    assert snap_doc.pkg_version == doc.pkg_version
+    assert {i.name: i.data for i in snap_doc.opaf_images} == {
+        i.name: i.data for i in doc.opaf_images
+    }
+
+    # Snapshots compile to the same project as the package
+    configs = {'size': '2'}
+    expected = OPAFCompiler(doc, configs=configs).compile(PROJECT)
+    result = OPAFCompiler(snap_doc, configs=configs).compile(PROJECT)
+
+    assert normalize(result) == normalize(expected)
+
+
+def test_snapshot_rejects_other_files(package_path, tmp_path):
+    path = str(tmp_path / 'broken.opafsnap')
+
+    with open(path, 'wb') as f:
+        f.write(b'OPAFSNAP' + b'\0' * 8)
+
+    with pytest.raises(Exception):
+        OPAFSnapshot.load(path)
+
+    with pytest.raises(Exception):
+        OPAFSnapshot.load(package_path)
@@ -0,0 +1,49 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+from xml.dom.minidom import parseString
+
+from opaf.lib import OPAFCompiler, OPAFParser, Utils
+from tests import PROJECT
+
+
+def test_get_stitch_count():
+    row = parseString(
+        '<row><action total="2"/><text data="x"/>'
+        '<repeat count="3"><action total="1.0"/></repeat>'
+        '<instruction><action total="4"/></instruction></row>'
+    ).documentElement
+
+    assert Utils.get_stitch_count(row.childNodes) == 9
+
+
+def test_get_stitch_count_uses_recorded_counts():
+    row = parseString('<row><action total="2"/><action total="3"/></row>')
+    first = row.documentElement.firstChild
+
+    assert Utils.get_stitch_count([first], {id(first): (first, 5)}) == 5
+
+
+def test_compiled_rows_have_stitch_counts(package_path):
+    doc = OPAFParser(package_path).parse()
+    compiler = OPAFCompiler(doc, count_stitches=True)
+    root = parseString(compiler.compile(PROJECT)).documentElement
+
+    for row in root.getElementsByTagName('row'):
+        assert int(row.getAttribute('stitch_count')) == Utils.get_stitch_count(
+            row.childNodes
+        )
+
+    assert compiler.stitch_report
@@ -0,0 +1,46 @@
+#   Copyright 2023 Scott Ware
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+
+from opaf.lib import OPAFBuildCache, OPAFParser, OPAFWatcher
+
+
+def test_watcher_sees_changes_made_during_build(pattern_path):
+    watcher = OPAFWatcher()
+    states = watcher.get_states([pattern_path])
+
+    # Edit made after the snapshot but before the paths are set
+    os.utime(pattern_path, ns=(0, 0))
+    watcher.set_paths([pattern_path], states)
+
+    assert watcher.poll() == [os.path.abspath(pattern_path)]
+    assert watcher.poll() == []
+
+
+def test_parser_reports_parsed_paths(pattern_path):
+    cache = OPAFBuildCache(OPAFBuildCache.get_path(pattern_path))
+
+    opaf_parser = OPAFParser(pattern_path, build_cache=cache)
+    opaf_parser.parse()
+
+    assert os.path.abspath(pattern_path) in opaf_parser.parsed_paths
+    assert set(opaf_parser.parsed_paths) <= set(opaf_parser.dependencies)
+
+    # Nothing is parsed when every file is loaded from the build cache
+    opaf_parser = OPAFParser(pattern_path, build_cache=cache)
+    opaf_parser.parse()
+
+    assert opaf_parser.parsed_paths == []